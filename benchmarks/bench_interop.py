@@ -0,0 +1,61 @@
+"""Measure passing a 10M-element array into `run` and back out.
+
+Run from the repository root:
+
+    $ python -m benchmarks.bench_interop [N]
+
+"copy" is what a caller had to do before the conversion layer: turn the
+array into a list to pass it in, and build a new array from the list
+that comes back. "view" hands the array to `run` as it is; it reaches
+the program as a `Vector` over the same memory and comes back out as a
+memoryview of it. The program reads one element and drops the first
+one with `cdr`, which copies a list but only slices a view.
+"""
+
+import gc
+import sys
+import time
+from array import array
+from src.file import run
+from src.interop import to_python
+
+PROGRAM = '(begin (vector-ref data (- (vector-length data) 1)) (cdr data))'
+LIST_PROGRAM = '(begin (car data) (cdr data))'
+
+
+def timed(fn):
+    gc.collect()
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main(n: int = 10_000_000) -> None:
+    data = array('d', range(n))
+    raw = bytes(n)
+    print(f'{n:,} doubles, {n:,} bytes')
+
+    def copy_round_trip():
+        result = run(LIST_PROGRAM, {'data': data.tolist()})
+        return array('d', result)
+
+    def view_round_trip():
+        return to_python(run(PROGRAM, {'data': data}))
+
+    copied, copy_time = timed(copy_round_trip)
+    viewed, view_time = timed(view_round_trip)
+    assert copied == array('d', viewed) and viewed.obj is data
+    print(f'copy in and out   {copy_time * 1000:10.2f} ms')
+    print(f'view in and out   {view_time * 1000:10.2f} ms '
+          f'({copy_time / view_time:,.0f}x)')
+
+    copied, copy_time = timed(lambda: bytes(run(LIST_PROGRAM, {'data': list(raw)})))
+    viewed, view_time = timed(lambda: to_python(run(PROGRAM, {'data': raw})))
+    assert copied == viewed.tobytes()
+    print(f'bytes, copied     {copy_time * 1000:10.2f} ms')
+    print(f'bytes, viewed     {view_time * 1000:10.2f} ms '
+          f'({copy_time / view_time:,.0f}x)')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
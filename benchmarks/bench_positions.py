@@ -0,0 +1,108 @@
+"""Measure what recording source positions costs.
+
+Run from the repository root:
+
+    $ python -m benchmarks.bench_positions
+
+The reader keeps positions in a side table, so `read_program` returns the
+same plain lists as `parse` and evaluating them should take the same time.
+`reference_evaluate` is a copy of the evaluator without the exception
+hook that collects Lisp frames, to show that the hook costs nothing
+until an error is raised. The JIT is turned off, since it would compile `fib` and the
+comparison would no longer be between two interpreters.
+"""
+
+import timeit
+from src import jit
+from src.closures import closure_env
+from src.environment import Env, StandartEnv
+from src.evaluator import evaluate, Procedure
+from src.streams import Promise, Stream, stream_for_each, stream_fold
+from src.parser import parse, read_program
+from src.types import Symbol, List
+
+PROGRAM = '''
+(begin
+  (define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))
+  (fib 18))
+'''
+
+
+def reference_evaluate(x, env):
+    "evaluate without the exception hook; keep the branches in step with it."
+    if isinstance(x, Symbol):
+        return env.find(x)[x]
+    elif not isinstance(x, List):
+        return x
+    elif x[0] == 'quote':
+        (_, exp) = x
+        return exp
+    elif x[0] == 'if':
+        (_, test, conseq, alt) = x
+        exp = (conseq if reference_evaluate(test, env) else alt)
+        return reference_evaluate(exp, env)
+    elif x[0] == 'define':
+        (_, var, exp) = x
+        env[var] = reference_evaluate(exp, env)
+    elif x[0] == 'set!':
+        (_, var, exp) = x
+        env.find(var)[var] = reference_evaluate(exp, env)
+    elif x[0] == 'lambda':
+        (_, parms, body) = x
+        return ReferenceProcedure(parms, body, closure_env(x, env))
+    elif x[0] == 'delay':
+        (_, exp) = x
+        return Promise(lambda: reference_evaluate(exp, env))
+    elif x[0] == 'stream-cons':
+        (_, first, rest) = x
+        return Stream(reference_evaluate(first, env),
+                      Promise(lambda: reference_evaluate(rest, env)))
+    elif x[0] == 'stream-for-each':
+        (_, proc, stream) = x
+        return stream_for_each(reference_evaluate(proc, env),
+                               reference_evaluate(stream, env))
+    elif x[0] == 'stream-fold':
+        (_, proc, init, stream) = x
+        return stream_fold(reference_evaluate(proc, env),
+                           reference_evaluate(init, env),
+                           reference_evaluate(stream, env))
+    else:
+        proc = reference_evaluate(x[0], env)
+        args = [reference_evaluate(exp, env) for exp in x[1:]]
+        return proc(*args)
+
+
+class ReferenceProcedure(Procedure):
+    __slots__ = ()
+
+    def __call__(self, *args):
+        self.calls += 1  # as Procedure does, with the JIT off
+        return reference_evaluate(self.body, Env(self.parms, args, self.env))
+
+
+def best(stmt, number=1, repeat=5) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=repeat))
+
+
+def main() -> None:
+    jit.enabled = False
+    source = PROGRAM * 50
+    parse_time = best(lambda: parse(PROGRAM), number=50)
+    read_time = best(lambda: read_program(source))
+    print(f'parse x50         {parse_time * 1000:8.2f} ms')
+    print(f'read_program x50  {read_time * 1000:8.2f} ms')
+
+    plain = parse(PROGRAM)
+    [positioned], _ = read_program(PROGRAM)
+    reference = best(lambda: reference_evaluate(plain, StandartEnv()))
+    hooked = best(lambda: evaluate(plain, StandartEnv()))
+    mapped = best(lambda: evaluate(positioned, StandartEnv()))
+    print(f'reference eval    {reference * 1000:8.2f} ms')
+    print(f'evaluate          {hooked * 1000:8.2f} ms '
+          f'({(hooked / reference - 1) * 100:+.1f}%)')
+    print(f'evaluate, mapped  {mapped * 1000:8.2f} ms '
+          f'({(mapped / reference - 1) * 100:+.1f}%)')
+
+
+if __name__ == '__main__':
+    main()
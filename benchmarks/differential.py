@@ -0,0 +1,407 @@
+"""Run the same programs through every engine and compare what they compute.
+
+Run from the repository root:
+
+    $ python -m benchmarks.differential [--random N] [--seed S] [--json PATH]
+
+The corpus is `lis_tests` and `lispy_tests` from original/lispytest.py
+plus N randomly generated programs. The engines are the `src`
+interpreter in several configurations (plain, with every procedure
+compiled by the JIT, through a `ResultCache`, with metrics enabled) and
+the original interpreters. original/lispy.py is Python 2 source and is
+reported as unavailable. A program's outcome is the value of its last
+form or the class of the first exception it raised; every engine that
+runs a corpus must agree with the first one on every program. The exit
+status is 1 if any of them does not.
+
+Timings are per program, and the summary gives each engine's total and
+its geometric mean time relative to the first engine. With --json they
+are written out per program as well.
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import random
+import sys
+import time
+from typing import Any, Callable, Iterator, NamedTuple
+from src import jit, metrics
+from src.cache import ResultCache
+from src.environment import StandartEnv
+from src.evaluator import evaluate
+from src.interop import Vector, SequenceView
+from src.parser import parse
+from src.types import Symbol
+
+TESTS = 'original/lispytest.py'
+
+
+class Program(NamedTuple):
+    name: str
+    forms: list[str]
+    expected: Any = None
+
+
+class Corpus(NamedTuple):
+    name: str
+    dialect: str      # 'lis' or 'lispy': which engines are expected to run it
+    programs: list[Program]
+    shared_env: bool  # do the programs run one after the other in one env?
+
+
+class Outcome(NamedTuple):
+    value: Any = None
+    error: str | None = None
+
+    def __str__(self) -> str:
+        return f'raises {self.error}' if self.error else repr(self.value)
+
+
+# ___________________________________________ Engines
+
+class Engine:
+    "One way of evaluating programs."
+    dialects = frozenset({'lis', 'lispy'})
+    symbol_type: type = Symbol
+    unavailable: str | None = None
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def new_env(self) -> Any:
+        return StandartEnv()
+
+    def evaluate(self, source: str, env: Any) -> Any:
+        return evaluate(parse(source), env)
+
+    @contextlib.contextmanager
+    def settings(self) -> Iterator[None]:
+        "Switch global interpreter settings on while this engine runs."
+        enabled = jit.enabled
+        jit.enabled = False
+        try:
+            yield
+        finally:
+            jit.enabled = enabled
+
+    def error_class(self, exc: BaseException) -> str:
+        return type(exc).__name__
+
+
+class JitEngine(Engine):
+    "Every procedure is compiled on its first call."
+
+    @contextlib.contextmanager
+    def settings(self) -> Iterator[None]:
+        enabled, threshold = jit.enabled, jit.threshold
+        jit.enabled, jit.threshold = True, 1
+        try:
+            yield
+        finally:
+            jit.enabled, jit.threshold = enabled, threshold
+
+
+class CacheEngine(Engine):
+    "Top-level forms go through one ResultCache shared by every program."
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.cache = ResultCache()
+
+    def evaluate(self, source: str, env: Any) -> Any:
+        return self.cache.evaluate(parse(source), env)
+
+
+class MetricsEngine(Engine):
+    "Evaluation with the counting hooks of the metrics module installed."
+
+    @contextlib.contextmanager
+    def settings(self) -> Iterator[None]:
+        with super().settings():
+            metrics.enable()
+            try:
+                yield
+            finally:
+                metrics.disable()
+
+
+class OriginalEngine(Engine):
+    "One of Norvig's interpreters in original/, loaded from source."
+    symbol_type = str
+
+    def __init__(self, name: str, path: str, dialects: frozenset):
+        super().__init__(name)
+        self.dialects = dialects
+        # Python 2 builtins the files rely on.
+        self.namespace = {'__name__': name, 'apply': lambda f, args: f(*args),
+                          'map': lambda *args: list(map(*args))}
+        try:
+            with open(path) as file:
+                exec(compile(file.read(), path, 'exec'), self.namespace)
+        except SyntaxError as exc:
+            self.unavailable = f'{path} does not compile: {exc.msg} (line {exc.lineno})'
+
+    def new_env(self) -> Any:
+        return self.namespace['standard_env']()
+
+    def evaluate(self, source: str, env: Any) -> Any:
+        return self.namespace['eval'](self.namespace['parse'](source), env)
+
+    @contextlib.contextmanager
+    def settings(self) -> Iterator[None]:
+        yield
+
+    def error_class(self, exc: BaseException) -> str:
+        # The original Env.find reports an unbound variable by running
+        # into the outer environment of the global one, which is None.
+        if isinstance(exc, AttributeError) and "'find'" in str(exc):
+            return 'LookupError'
+        return type(exc).__name__
+
+
+def engines() -> list[Engine]:
+    return [
+        Engine('src'),
+        JitEngine('src-jit'),
+        CacheEngine('src-cache'),
+        MetricsEngine('src-metrics'),
+        OriginalEngine('original-lis', 'original/lis.py', frozenset({'lis'})),
+        OriginalEngine('original-lispy', 'original/lispy.py',
+                       frozenset({'lis', 'lispy'})),
+    ]
+
+
+# ___________________________________________ Outcomes
+
+def normalize(x: Any, symbol_type: type = Symbol) -> Any:
+    "A form of x that does not depend on which engine computed it."
+    if isinstance(x, bool):
+        return ('bool', x)
+    elif isinstance(x, (list, tuple, Vector, SequenceView)):
+        return [normalize(item, symbol_type) for item in x]
+    elif isinstance(x, symbol_type):
+        return ('symbol', str(x))
+    elif isinstance(x, (int, float, complex, str)):
+        return (type(x).__name__, x)
+    elif x is None:
+        return None
+    elif callable(x):
+        return ('procedure',)
+    return (type(x).__name__, repr(x))
+
+
+def run_program(engine: Engine, program: Program, env: Any) -> tuple[Outcome, float]:
+    value = None
+    started = time.perf_counter()
+    try:
+        for form in program.forms:
+            value = engine.evaluate(form, env)
+    except Exception as exc:
+        elapsed = time.perf_counter() - started
+        return Outcome(error=engine.error_class(exc)), elapsed
+    elapsed = time.perf_counter() - started
+    return Outcome(normalize(value, engine.symbol_type)), elapsed
+
+
+def run_corpus(engine: Engine, corpus: Corpus) -> list[tuple[Outcome, float]]:
+    results = []
+    with engine.settings():
+        env = engine.new_env()
+        for program in corpus.programs:
+            if not corpus.shared_env:
+                env = engine.new_env()
+            results.append(run_program(engine, program, env))
+    return results
+
+
+def expected_outcome(expected: Any) -> Outcome:
+    "The outcome a lispytest.py expectation stands for."
+    if isinstance(expected, type) and issubclass(expected, Exception):
+        return Outcome(error=expected.__name__)
+    return Outcome(normalize(expected, str))  # symbols are plain strings there
+
+
+# ___________________________________________ Corpus
+
+def load_tests(path: str = TESTS) -> list[Corpus]:
+    "lis_tests and lispy_tests, read out of the (Python 2) test module."
+    with open(path) as file:
+        source = file.read()
+    namespace: dict = {}
+    exec(source[source.index('lis_tests = ['):source.index('def test(')], namespace)
+    return [Corpus(name, dialect,
+                   [Program(f'{name}[{i}]', [exp], expected)
+                    for i, (exp, expected) in enumerate(namespace[name])],
+                   shared_env=True)
+            for name, dialect in (('lis_tests', 'lis'), ('lispy_tests', 'lispy'))]
+
+
+class ProgramGenerator:
+    """Random programs in the subset of Scheme every engine understands.
+
+    Expressions are typed (number, boolean or list) so most programs run
+    to the end; a few deliberately take the car of an empty list, some
+    define a recursive procedure and call it, and some call a procedure
+    that `set!`s a global the caller reads afterwards.
+    """
+
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+
+    def program(self, name: str) -> Program:
+        forms = []
+        scope = ['x', 'y']
+        forms.append(f'(define x {self.random.randint(-5, 5)})')
+        forms.append(f'(define y {self.list_literal()})')
+        kind = self.random.random()
+        if kind < 0.35:
+            step = self.number(2, ['n'])  # acc only added to, so it stays small
+            forms.append('(define loop (lambda (n acc) '
+                         f'(if (<= n 0) acc (loop (- n 1) (+ acc {step})))))')
+            forms.append(f'(loop {self.random.randint(0, 40)} {self.number(1, scope)})')
+        elif kind < 0.6:
+            # A global assigned by a callee between two reads of it.
+            forms.append('(define bump (lambda (d) (set! x (+ x d))))')
+            forms.append('(define f (lambda (d) '
+                         f'(begin (bump d) {self.number(2, ["d", "x"])})))')
+            forms.append('(define loop (lambda (n acc) (if (<= n 0) acc '
+                         f'(loop (- n 1) (+ acc (f {self.number(1, ["n"])}))))))')
+            forms.append(f'(loop {self.random.randint(0, 40)} 0)')
+        else:
+            forms.append(self.expression(4, scope))
+        return Program(name, forms)
+
+    def expression(self, depth: int, scope: list[str]) -> str:
+        kind = self.random.choice((self.number, self.number, self.boolean, self.list_expr))
+        return kind(depth, scope)
+
+    def number(self, depth: int, scope: list[str]) -> str:
+        choice = self.random.randrange(7 if depth > 0 else 2)
+        if choice == 0:
+            return str(self.random.randint(-10, 10))
+        elif choice == 1:
+            numbers = [var for var in scope if var != 'y']
+            return self.random.choice(numbers) if numbers else '0'
+        elif choice <= 3:
+            op = self.random.choice('+-*')
+            return f'({op} {self.number(depth - 1, scope)} {self.number(depth - 1, scope)})'
+        elif choice == 4:
+            return (f'(if {self.boolean(depth - 1, scope)} '
+                    f'{self.number(depth - 1, scope)} {self.number(depth - 1, scope)})')
+        elif choice == 5:
+            var = f'v{depth}'
+            return (f'((lambda ({var}) {self.number(depth - 1, scope + [var])}) '
+                    f'{self.number(depth - 1, scope)})')
+        elif self.random.random() < 0.1:
+            return "(car (quote ()))"  # an IndexError
+        return self.random.choice((f'(length {self.list_expr(depth - 1, scope)})',
+                                   f'(car {self.nonempty_list(depth - 1, scope)})'))
+
+    def boolean(self, depth: int, scope: list[str]) -> str:
+        if depth <= 0:
+            return self.random.choice(('(= 1 1)', '(< 2 1)'))
+        choice = self.random.randrange(3)
+        if choice == 0:
+            op = self.random.choice(('<', '>', '=', '<=', '>='))
+            return f'({op} {self.number(depth - 1, scope)} {self.number(depth - 1, scope)})'
+        elif choice == 1:
+            return f'(not {self.boolean(depth - 1, scope)})'
+        return f'(null? {self.list_expr(depth - 1, scope)})'
+
+    def list_expr(self, depth: int, scope: list[str]) -> str:
+        choice = self.random.randrange(5 if depth > 0 else 1)
+        if choice == 0:
+            return self.list_literal()
+        elif choice == 1 and 'y' in scope:
+            return 'y'
+        elif choice == 2:
+            return f'(cdr {self.nonempty_list(depth - 1, scope)})'
+        elif choice == 3:
+            return f'(cons {self.number(depth - 1, scope)} {self.list_expr(depth - 1, scope)})'
+        return f'(list {self.number(depth - 1, scope)} {self.number(depth - 1, scope)})'
+
+    def nonempty_list(self, depth: int, scope: list[str]) -> str:
+        return f'(cons {self.number(depth, scope)} {self.list_expr(depth, scope)})'
+
+    def list_literal(self) -> str:
+        items = ' '.join(str(self.random.randint(-9, 9))
+                         for _ in range(self.random.randrange(4)))
+        return f'(quote ({items}))'
+
+
+def random_corpus(count: int, seed: int) -> Corpus:
+    generator = ProgramGenerator(seed)
+    return Corpus('random', 'lis',
+                  [generator.program(f'random[{i}]') for i in range(count)],
+                  shared_env=False)
+
+
+# ___________________________________________ Report
+
+def compare(corpora: list[Corpus], all_engines: list[Engine],
+            out: Callable[[str], Any] = print) -> tuple[int, list[dict]]:
+    "Run every corpus; return the number of disagreements and per-program records."
+    mismatches = 0
+    records = []
+    for engine in all_engines:
+        if engine.unavailable:
+            out(f'{engine.name}: unavailable, {engine.unavailable}')
+    for corpus in corpora:
+        runners = [engine for engine in all_engines
+                   if corpus.dialect in engine.dialects and not engine.unavailable]
+        results = {engine.name: run_corpus(engine, corpus) for engine in runners}
+        reference = runners[0].name
+        out(f'\n{corpus.name}: {len(corpus.programs)} programs, '
+            f'{", ".join(results)} (relative to {reference})')
+
+        unexpected = 0
+        for index, program in enumerate(corpus.programs):
+            ref_outcome, ref_time = results[reference][index]
+            timings = {}
+            for name, engine_results in results.items():
+                outcome, elapsed = engine_results[index]
+                timings[name] = elapsed
+                if outcome != ref_outcome:
+                    mismatches += 1
+                    out(f'  MISMATCH {program.name} {name}: {outcome}, '
+                        f'{reference}: {ref_outcome}')
+                    out('    ' + '\n    '.join(program.forms))
+            if program.expected is not None and ref_outcome != expected_outcome(program.expected):
+                unexpected += 1
+            records.append({'corpus': corpus.name, 'program': program.name,
+                            'outcome': str(ref_outcome), 'seconds': timings})
+
+        for name, engine_results in results.items():
+            total = sum(elapsed for _, elapsed in engine_results)
+            ratios = [elapsed / ref for (_, elapsed), (_, ref)
+                      in zip(engine_results, results[reference]) if ref > 0 and elapsed > 0]
+            mean = math.exp(sum(map(math.log, ratios)) / len(ratios)) if ratios else 1.0
+            out(f'  {name:16} {total * 1000:10.2f} ms  x{mean:.2f}')
+        if any(program.expected is not None for program in corpus.programs):
+            out(f'  {reference} differs from lispytest.py expectations '
+                f'on {unexpected} of {len(corpus.programs)}')
+    return mismatches, records
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--random', type=int, default=200,
+                        help='number of random programs (default 200)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', metavar='PATH',
+                        help='write per-program outcomes and timings here')
+    args = parser.parse_args(argv)
+
+    corpora = load_tests() + [random_corpus(args.random, args.seed)]
+    mismatches, records = compare(corpora, engines())
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(records, file, indent=1)
+    print(f'\n{mismatches} mismatches')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
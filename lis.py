@@ -1,17 +1,35 @@
+import os
 import sys
+from src import modules
 from src.file import run_file
+from src.incremental import watch
+from src.profiler import Profiler
 from src.repl import repl
 
 
 def main(args: list[str]) -> None:
     if len(args) == 1:
         repl()
+    elif args[1] == '--watch' and len(args) == 3:
+        watch(args[2])
+    elif args[1] == '--profile' and len(args) == 3:
+        profiler = Profiler()
+        modules.search_path.insert(0, os.path.dirname(os.path.abspath(args[2])))
+        with open(args[2]) as file:
+            try:
+                profiler.run(file.read(), filename=args[2])
+            except Exception as err:
+                report_error(err)
+        print(profiler.report(), file=sys.stderr)
     else:
-
+        modules.search_path.insert(0, os.path.dirname(os.path.abspath(args[1])))
         with open(args[1]) as file:
             try:
                 run_file(file)
             except Exception as err:
+                if type(err) is not LookupError:  # not an undefined name
+                    report_error(err)
+                    sys.exit(1)
                 key = err.args[0]
                 print(f'\t {key!r} was not defined')
                 cmd = ' '.join(args)
@@ -19,5 +37,11 @@ def main(args: list[str]) -> None:
                 print(f'      $ {cmd} {key}=<value>')
 
 
+def report_error(err: Exception) -> None:
+    print(f'{type(err).__name__}: {err}', file=sys.stderr)
+    for note in getattr(err, '__notes__', ()):
+        print(note, file=sys.stderr)
+
+
 if __name__ == '__main__':
     main(sys.argv)
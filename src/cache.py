@@ -0,0 +1,222 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Any
+from .environment import Env, StandartEnv
+from .evaluator import evaluate, Procedure
+from .interop import Vector, SequenceView
+from .types import Symbol, List, HashTable
+
+
+# Builtins of StandartEnv that neither have side effects nor return
+# lazy or mutable objects: the hash table and stream builtins are left
+# out, since tables are mutable and streams memoize as they are forced.
+PURE_BUILTINS = frozenset({
+    '+', '-', '*', '/', '>', '<', '>=', '<=', '=',
+    'abs', 'append', 'apply', 'begin', 'car', 'cdr', 'cons', 'eq?',
+    'equal?', 'length', 'list', 'list?', 'map', 'max', 'min', 'not', 'null?',
+    'number?', 'procedure?', 'round', 'symbol?',
+    'string?', 'char?', 'string-length', 'string-ref', 'substring',
+    'string-append', 'string=?', 'string<?', 'string-upcase',
+    'string-downcase', 'string->symbol', 'symbol->string', 'string->list',
+    'list->string', 'string->number', 'number->string', 'char->integer',
+    'integer->char',
+}) | frozenset(name for name, value in vars(math).items()
+               if not name.startswith('_'))
+
+
+def _pure_objects() -> tuple[dict, frozenset]:
+    # Purity belongs to the builtin objects, not to their names: a caller
+    # may bind 'abs' to anything. StandartEnv makes new lambdas for every
+    # instance, so those are recognized by their code object.
+    env = StandartEnv()
+    objects, codes = {}, set()
+    for name in PURE_BUILTINS:
+        value = env[name]
+        code = getattr(value, '__code__', None)
+        if code is not None:
+            codes.add(code)
+        elif callable(value):
+            objects[id(value)] = value
+    return objects, frozenset(codes)
+
+
+_PURE_OBJECTS, _PURE_CODES = _pure_objects()
+
+
+def is_pure_builtin(value) -> bool:
+    "True if value is one of the side-effect-free builtins of StandartEnv."
+    return (_PURE_OBJECTS.get(id(value)) is value
+            or getattr(value, '__code__', None) in _PURE_CODES)
+
+
+class Uncacheable(Exception):
+    """The form has side effects or reads something that cannot be versioned."""
+
+
+def structural_key(x) -> tuple:
+    "A hashable key equal for structurally equal forms, keeping 1 and 1.0 apart."
+    if isinstance(x, List):
+        return (List, *map(structural_key, x))
+    return (type(x), x)
+
+
+class ResultCache:
+    """Opt-in cache of the results of pure top-level forms.
+
+    A form is cached under its structural key together with the global
+    bindings it reads, directly or through the user procedures it calls.
+    A hit is only returned if every one of those bindings is unchanged,
+    so redefining a procedure or a constant invalidates dependent entries.
+    Data is compared by structure, so a list changed in place does too.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.evictions = 0
+
+    def evaluate(self, x, env: Env) -> Any:
+        "Evaluate x in env, reusing a previous result when nothing it reads changed."
+        if not isinstance(x, List):
+            return evaluate(x, env)
+        key = structural_key(x)
+        entry = self.entries.get(key)
+        if entry is not None:
+            deps, result, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self.entries[key]
+                self.evictions += 1
+            elif all(_binding_matches(env, name, kind, value)
+                     for name, kind, value in deps):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return result
+        try:
+            deps = dependencies(x, env)
+        except Uncacheable:
+            self.uncacheable += 1
+            return evaluate(x, env)
+        self.misses += 1
+        result = evaluate(x, env)
+        self.entries[key] = (deps, result, time.monotonic())
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'uncacheable': self.uncacheable,
+            'evictions': self.evictions,
+            'size': len(self.entries),
+            'hit_rate': self.hit_rate,
+        }
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+def dependencies(x, env: Env) -> tuple:
+    """Return the global bindings a pure form reads, as (name, kind, value).
+
+    Raise Uncacheable if x may have side effects.
+    """
+    deps = {}
+    try:
+        _collect(x, frozenset(), env, deps, set())
+    except (ValueError, TypeError):  # malformed special form; let evaluate report it
+        raise Uncacheable(x)
+    return tuple((name, kind, value) for name, (kind, value) in deps.items())
+
+
+def _collect(x, local: frozenset, env: Env, deps: dict, visited: set) -> None:
+    if isinstance(x, Symbol):
+        if x not in local:
+            _collect_global(x, env, deps, visited)
+    elif not isinstance(x, List) or not x:
+        return
+    elif x[0] == 'quote':
+        return
+    elif x[0] == 'lambda':
+        (_, parms, body) = x
+        bound = {parms} if isinstance(parms, Symbol) else set(parms)
+        _collect(body, local | bound, env, deps, visited)
+    elif x[0] in ('define', 'set!'):
+        raise Uncacheable(x[0])
+    else:
+        if x[0] != 'if':
+            _collect(x[0], local, env, deps, visited)
+        for exp in x[1:]:
+            _collect(exp, local, env, deps, visited)
+
+
+def _collect_global(name: str, env: Env, deps: dict, visited: set) -> None:
+    if name in deps:
+        return
+    try:
+        value = env.find(name)[name]
+    except LookupError:
+        raise Uncacheable(name)
+    if isinstance(value, Procedure):
+        if value.env is not env:  # a closure over some other frame
+            raise Uncacheable(name)
+        deps[name] = ('procedure', value)
+        if id(value) not in visited:
+            visited.add(id(value))
+            parms = value.parms
+            bound = {parms} if isinstance(parms, Symbol) else set(parms)
+            _collect(value.body, frozenset(bound), env, deps, visited)
+    elif isinstance(value, (HashTable, Vector, SequenceView)):  # can change behind our back
+        raise Uncacheable(name)
+    elif callable(value):
+        if not is_pure_builtin(value):
+            raise Uncacheable(name)
+        deps[name] = ('builtin', value)
+    else:
+        deps[name] = ('data', _data_key(value, name))
+
+
+def _data_key(x, name: str) -> tuple:
+    "structural_key of data; Uncacheable if it holds something mutable or callable."
+    if isinstance(x, List):
+        return (List, *(_data_key(item, name) for item in x))
+    elif callable(x) or isinstance(x, (HashTable, Vector, SequenceView)):
+        raise Uncacheable(name)
+    return (type(x), x)
+
+
+def _binding_matches(env: Env, name: str, kind: str, expected) -> bool:
+    try:
+        value = env.find(name)[name]
+    except LookupError:
+        return False
+    if kind == 'builtin':
+        # Every StandartEnv makes its own lambdas, but they share code.
+        code = getattr(expected, '__code__', None)
+        return value is expected or (
+            code is not None and getattr(value, '__code__', None) is code)
+    elif kind == 'procedure':
+        # Compare by structure, so that rerunning the same definitions
+        # in a fresh environment still hits.
+        return value is expected or (
+            isinstance(value, Procedure) and value.env is env
+            and structural_key(value.parms) == structural_key(expected.parms)
+            and structural_key(value.body) == structural_key(expected.body))
+    else:
+        try:
+            return _data_key(value, name) == expected
+        except Uncacheable:
+            return False
@@ -0,0 +1,159 @@
+"""Closure conversion: nested lambdas capture only the variables they use.
+
+When a top-level `lambda` is first evaluated its body is analyzed once,
+and every lambda nested in it gets a plan saying how to capture each of
+its free variables:
+
+* copy: a parameter of an enclosing lambda that is never `set!`; its
+  value is copied into the closure record.
+* local / inherited: a variable that is assigned or introduced by an
+  internal `define`; the closure keeps the frame that binds it, taken
+  from the current frame (local) or from the enclosing closure
+  (inherited), so updates stay shared.
+
+Everything else is global and looked up through the environment the
+top-level lambda was created in. Top-level lambdas, and any lambda
+without a plan, keep capturing their whole environment as before.
+
+A closure only skips over the closure of its enclosing lambda when both
+were planned by the same analysis. The plans are dropped when there
+are too many of them, and a lambda evaluated again after that is
+analyzed as if it were top-level, while procedures made from it before
+still have closures planned from further out; their variables must
+stay reachable.
+"""
+
+from .environment import Env, Closure
+from .types import Symbol, List
+
+MAX_PLANS = 10_000
+
+# id(lambda form) -> (form, plan); a plan of None means "capture env".
+_plans: dict[int, tuple[list, tuple | None]] = {}
+
+
+def closure_env(x: List, env: Env):
+    "Return the environment a procedure for lambda form x should keep."
+    entry = _plans.get(id(x))
+    if entry is None or entry[0] is not x:
+        register(x)
+        return env
+    plan = entry[1]
+    if plan is None:
+        return env
+    return capture(plan, env)
+
+
+def capture(plan: tuple, env: Env):
+    "Build the closure record for plan, falling back to env if it cannot."
+    copy, local, inherited, analysis = plan
+    parent = env.outer
+    if isinstance(parent, Closure) and parent.analysis is analysis:
+        outer = parent.outer
+    elif inherited:
+        return env
+    else:
+        outer = parent
+    closure = Closure(outer, analysis)
+    try:
+        for var in copy:
+            closure[var] = env.find(var)[var]
+        for var in inherited:
+            closure.frames[var] = parent.frames[var]
+    except LookupError:
+        return env
+    for var in local:
+        closure.frames[var] = env
+    return closure
+
+
+def register(x: List) -> None:
+    "Analyze top-level lambda x and store plans for the lambdas inside it."
+    if len(_plans) >= MAX_PLANS:
+        _plans.clear()  # see the module docstring
+    found = {}
+    try:
+        _analyze(x, [], found)
+    except (ValueError, TypeError):  # malformed; evaluate will complain
+        found = {}
+    for form, entries in found.values():
+        _plans[id(form)] = (form, _classify(entries) + (x,))
+    _plans[id(x)] = (x, None)
+
+
+class _Scope:
+    __slots__ = ('bound', 'defined', 'assigned')
+
+    def __init__(self, bound: set, defined: set):
+        self.bound = bound
+        self.defined = defined
+        self.assigned = set()
+
+
+def _analyze(x: List, scopes: list, found: dict) -> set:
+    "Return the free variables of lambda x, recording nested lambdas in found."
+    (_, parms, body) = x
+    defined = _defines(body)
+    params = {parms} if isinstance(parms, Symbol) else set(parms)
+    scope = _Scope(params | defined, defined)
+    free = set()
+    _walk(body, scopes + [scope], free, found)
+    if scopes:
+        entries = []
+        for var in free:
+            for depth, outer in enumerate(reversed(scopes)):
+                if var in outer.bound:
+                    entries.append((var, outer, depth == 0))
+                    break
+        found[id(x)] = (x, entries)
+    return free
+
+
+def _walk(x, scopes: list, free: set, found: dict) -> None:
+    scope = scopes[-1]
+    if isinstance(x, Symbol):
+        if x not in scope.bound:
+            free.add(x)
+    elif not isinstance(x, List) or not x:
+        return
+    elif x[0] == 'quote':
+        return
+    elif x[0] == 'lambda':
+        free |= _analyze(x, scopes, found) - scope.bound
+    elif x[0] == 'set!':
+        var = x[1]
+        for outer in reversed(scopes):
+            if var in outer.bound:
+                outer.assigned.add(var)
+                break
+        if var not in scope.bound:
+            free.add(var)
+        for exp in x[2:]:
+            _walk(exp, scopes, free, found)
+    elif x[0] == 'define':
+        for exp in x[2:]:
+            _walk(exp, scopes, free, found)
+    else:
+        for exp in (x[1:] if x[0] == 'if' else x):
+            _walk(exp, scopes, free, found)
+
+
+def _defines(x) -> set:
+    "Names bound by `define` in x, not looking inside nested lambdas."
+    names = set()
+    if isinstance(x, List) and x and x[0] not in ('quote', 'lambda'):
+        if x[0] == 'define' and len(x) > 1 and isinstance(x[1], Symbol):
+            names.add(x[1])
+        for exp in x:
+            names |= _defines(exp)
+    return names
+
+
+def _classify(entries: list) -> tuple:
+    copy, local, inherited = [], [], []
+    for var, scope, immediate in entries:
+        if var in scope.defined or var in scope.assigned:
+            (local if immediate else inherited).append(var)
+        else:
+            copy.append(var)
+    return tuple(copy), tuple(local), tuple(inherited)
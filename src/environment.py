@@ -1,10 +1,17 @@
+import gc
 import math
 import operator as op
-from .types import Symbol, Number
+import sys
+from . import streams
+from .interop import Vector, SequenceView, as_list, make_vector
+from .printer import lisp_str
+from .exceptions import MissingKey
+from .types import Symbol, Char, String, Number, HashTable, intern
 
 
 class Env(dict):
     "An environment: a dict of {'var':val} pairs, with an outer Env."
+    imports = ()  # modules brought in with require, see modules.py
 
     def __init__(self, parms=(), args=(), outer=None):
         # Bind parm list to corresponding args, or single parm to list of args
@@ -22,9 +29,44 @@ class Env(dict):
         if var in self:
             return self
         elif self.outer is None:
-            raise LookupError(var)
-        else:
+            return self.find_import(var)
+        try:
             return self.outer.find(var)
+        except LookupError:
+            # Names no frame binds come from required modules, the ones
+            # required further out first.
+            if not self.imports:
+                raise
+            return self.find_import(var)
+
+    def find_import(self, var):
+        "The module binding var, from the first one required here that exports it."
+        for module in self.imports:
+            if var in module.exports:
+                return module.find(var)
+        raise LookupError(var)
+
+
+class Closure(dict):
+    "The environment of a nested procedure: just the free variables it uses."
+    __slots__ = ('frames', 'outer', 'analysis')
+
+    def __init__(self, outer, analysis=None):
+        # Copied values live in the dict itself; frames maps each shared
+        # (assigned or internally defined) variable to the frame binding it.
+        # analysis is the top-level lambda whose analysis planned it.
+        self.frames = {}
+        self.outer = outer
+        self.analysis = analysis
+
+    def find(self, var):
+        "Find the innermost Env where var appears."
+        if var in self:
+            return self
+        frame = self.frames.get(var)
+        if frame is not None:
+            return frame
+        return self.outer.find(var)
 
 
 class StandartEnv(Env):
@@ -44,45 +86,143 @@ class StandartEnv(Env):
             '<=': op.le,
             '=': op.eq,
             'abs':     abs,
-            'append':  op.add,
+            'append': lambda x, y: as_list(x) + as_list(y),
             'apply': lambda proc, args: proc(*args),
             'begin': lambda *x: x[-1],
             'car': lambda x: x[0],
             'cdr': lambda x: x[1:],
-            'cons': lambda x, y: [x] + y,
+            'cons': lambda x, y: [x] + as_list(y),
             'eq?':     op.is_,
             'equal?':  op.eq,
             'length':  len,
             'list': lambda *x: list(x),
-            'list?': lambda x: isinstance(x, list),
-            'map':     map,
+            'list?': lambda x: isinstance(x, (list, Vector, SequenceView)),
+            'map': lambda proc, *lists: list(map(proc, *lists)),
             'max':     max,
+            'memory-stats': memory_stats,
             'min':     min,
             'not':     op.not_,
             'null?': lambda x: x == [],
             'number?': lambda x: isinstance(x, Number),
             'procedure?': callable,
+            'require': self.require,
             'round':   round,
             'symbol?': lambda x: isinstance(x, Symbol),
+            # strings and characters
+            'string?': lambda x: isinstance(x, String) and not isinstance(x, (Symbol, Char)),
+            'char?': lambda x: isinstance(x, Char),
+            'string-length': len,
+            'string-ref': lambda s, k: Char(s[k]),
+            'substring': lambda s, start, end=None: s[start:end],
+            'string-append': lambda *x: ''.join(x),
+            'string=?': op.eq,
+            'string<?': op.lt,
+            'string-upcase': str.upper,
+            'string-downcase': str.lower,
+            'string->symbol': intern,
+            'symbol->string': str,
+            'string->list': lambda s: [Char(c) for c in s],
+            'list->string': lambda x: ''.join(x),
+            'string->number': string_to_number,
+            'number->string': str,
+            'char->integer': ord,
+            'integer->char': lambda n: Char(chr(n)),
+            # promises and streams
+            'force': streams.force,
+            'make-promise': streams.make_promise,
+            'promise?': lambda x: isinstance(x, streams.Promise),
+            'the-empty-stream': streams.EMPTY_STREAM,
+            'stream?': lambda x: isinstance(x, streams.Stream) or streams.is_null(x),
+            'stream-pair?': lambda x: isinstance(x, streams.Stream),
+            'stream-null?': streams.is_null,
+            'stream-car': streams.stream_car,
+            'stream-cdr': streams.stream_cdr,
+            'stream-map': streams.stream_map,
+            'stream-filter': streams.stream_filter,
+            'stream-take': streams.stream_take,
+            'stream-drop': streams.stream_drop,
+            'stream-for-each': streams.stream_for_each,
+            'stream-fold': streams.stream_fold,
+            'stream->list': streams.stream_to_list,
+            'list->stream': streams.list_to_stream,
+            'iterator->stream': streams.iterator_to_stream,
+            # hash tables
+            'make-hash': lambda pairs=(): HashTable(pairs),
+            'hash?': lambda x: isinstance(x, HashTable),
+            'hash-ref': hash_ref,
+            'hash-set!': HashTable.set,
+            'hash-remove!': HashTable.remove,
+            'hash-has-key?': lambda h, key: key in h,
+            'hash-keys': HashTable.keys,
+            'hash-values': HashTable.values,
+            'hash-count': len,
+            # vectors
+            'vector': lambda *x: make_vector(x),
+            'vector?': lambda x: isinstance(x, (Vector, SequenceView)),
+            'bytevector?': lambda x: isinstance(x, Vector) and x.data.format == 'B',
+            'vector-length': len,
+            'vector-ref': lambda v, k: v[k],
+            'vector-set!': vector_set,
+            'vector->list': lambda v: v.tolist(),
+            'list->vector': make_vector,
         })
 
+    def require(self, name):
+        "Load module name (once per process) and import its definitions here."
+        from .modules import require
+        return require(name, self)
 
-isa = isinstance
+
+def string_to_number(s):
+    "Parse s as a number, or return #f."
+    try:
+        return int(s)
+    except ValueError:
+        try:
+            return float(s)
+        except ValueError:
+            return False
+
+
+def vector_set(v, k, x):
+    "Set element k of vector v to x; lists are not vectors."
+    if not isinstance(v, (Vector, SequenceView)):
+        raise TypeError(f'not a vector: {to_string(v)}')
+    v[k] = x
+
+
+_MISSING = object()
+
+
+def hash_ref(table, key, default=_MISSING):
+    "Look key up in table; without a default a missing key is an error."
+    value = table.get(key, _MISSING)
+    if value is _MISSING:
+        if default is _MISSING:
+            raise MissingKey(to_string(key))
+        return default
+    return value
+
+
+def memory_stats():
+    "Count live procedures, frames and closures and the bytes they retain."
+    from .evaluator import Procedure
+    counts = {'procedures': 0, 'frames': 0, 'closures': 0}
+    retained = 0
+    for obj in gc.get_objects():
+        if isinstance(obj, Procedure):
+            counts['procedures'] += 1
+        elif isinstance(obj, Closure):
+            counts['closures'] += 1
+            retained += sys.getsizeof(obj.frames)
+        elif isinstance(obj, Env):
+            counts['frames'] += 1
+        else:
+            continue
+        retained += sys.getsizeof(obj)
+    return [[name, count] for name, count in counts.items()] + [['bytes', retained]]
 
 
 def to_string(x):
     "Convert a Python object back into a Lisp-readable string."
-    if x is True:
-        return "#t"
-    elif x is False:
-        return "#f"
-    elif isa(x, Symbol):
-        return x
-    elif isa(x, str):
-        return '"%s"' % x.encode('string_escape').replace('"', r'\"')
-    elif isa(x, list):
-        return '('+' '.join(map(to_string, x))+')'
-    elif isa(x, complex):
-        return str(x).replace('j', 'i')
-    else:
-        return str(x)
+    return lisp_str(x)
@@ -1,59 +1,97 @@
+from . import jit
 from .environment import Env
+from .closures import closure_env
+from .printer import lisp_str
+from .streams import Promise, Stream, stream_for_each, stream_fold
 from .types import Symbol, Number, List
 
 
 def evaluate(x, env: Env):
     "Evaluate an expression in an environment."
-    if isinstance(x, Symbol):      # variable reference
-        symbol = env.find(x)
-        # print('symbol', symbol)
-        return env.find(x)[x]
-    elif not isinstance(x, List):  # constant literal
-        return x
-    elif x[0] == 'quote':          # (quote exp)
-        (_, exp) = x
-        return exp
-    elif x[0] == 'if':             # (if test conseq alt)
-        (_, test, conseq, alt) = x
-        exp = (conseq if evaluate(test, env) else alt)
-        return evaluate(exp, env)
-    elif x[0] == 'define':         # (define var exp)
-        (_, var, exp) = x
-        env[var] = evaluate(exp, env)
-    elif x[0] == 'set!':           # (set! var exp)
-        (_, var, exp) = x
-        env.find(var)[var] = evaluate(exp, env)
-    elif x[0] == 'lambda':         # (lambda (var...) body)
-        (_, parms, body) = x
-        return Procedure(parms, body, env)
-    else:                          # (proc arg...)
-        proc = evaluate(x[0], env)
-        args = [evaluate(exp, env) for exp in x[1:]]
-        return proc(*args)
+    try:
+        if isinstance(x, Symbol):      # variable reference
+            return env.find(x)[x]
+        elif not isinstance(x, List):  # constant literal
+            return x
+        elif x[0] == 'quote':          # (quote exp)
+            (_, exp) = x
+            return exp
+        elif x[0] == 'if':             # (if test conseq alt)
+            (_, test, conseq, alt) = x
+            exp = (conseq if evaluate(test, env) else alt)
+            return evaluate(exp, env)
+        elif x[0] == 'define':         # (define var exp)
+            (_, var, exp) = x
+            env[var] = evaluate(exp, env)
+        elif x[0] == 'set!':           # (set! var exp)
+            (_, var, exp) = x
+            env.find(var)[var] = evaluate(exp, env)
+        elif x[0] == 'lambda':         # (lambda (var...) body)
+            (_, parms, body) = x
+            return Procedure(parms, body, closure_env(x, env))
+        elif x[0] == 'delay':          # (delay exp)
+            (_, exp) = x
+            return Promise(lambda: evaluate(exp, env))
+        elif x[0] == 'stream-cons':    # (stream-cons first rest)
+            (_, first, rest) = x
+            return Stream(evaluate(first, env),
+                          Promise(lambda: evaluate(rest, env)))
+        elif x[0] == 'stream-for-each':  # (stream-for-each proc stream)
+            # Special forms so that no argument list holds on to the head
+            # of the stream while it is walked.
+            (_, proc, stream) = x
+            return stream_for_each(evaluate(proc, env), evaluate(stream, env))
+        elif x[0] == 'stream-fold':    # (stream-fold proc init stream)
+            (_, proc, init, stream) = x
+            return stream_fold(evaluate(proc, env), evaluate(init, env),
+                               evaluate(stream, env))
+        else:                          # (proc arg...)
+            proc = evaluate(x[0], env)
+            args = [evaluate(exp, env) for exp in x[1:]]
+            return proc(*args)
+    except Exception as exc:
+        # Only reached while an exception unwinds, so the normal path
+        # stays free; SourceMap.annotate turns these into positions.
+        if isinstance(x, List):
+            record_frame(exc, x)
+        raise
+
+
+def record_frame(exc: Exception, x: List) -> None:
+    "Remember that exc propagated out of form x, innermost first."
+    frames = getattr(exc, 'lisp_frames', None)
+    if frames is None:
+        frames = exc.lisp_frames = []
+    frames.append(x)
 
 
 def s_expr(obj: object) -> str:
     "Convert Python object into Lisp s-expression."
-    if obj == True:
-        return '#t'
-    elif obj == False:
-        return '#f'
-    elif isinstance(obj, list):
-        items = ' '.join(s_expr(x) for x in obj)
-        return f'({items})'
-    elif isinstance(obj, Symbol):
-        return obj
-    else:
-        return repr(obj)
+    return lisp_str(obj)
 
 # avaliar esta classe aqui
 
 
 class Procedure(object):
     "A user-defined Scheme procedure."
+    __slots__ = ('parms', 'body', 'env', 'calls', 'compiled')
 
     def __init__(self, parms, body, env):
         self.parms, self.body, self.env = parms, body, env
+        self.calls = 0
+        self.compiled = None
 
     def __call__(self, *args):
+        compiled = self.compiled
+        if compiled is not None:
+            return compiled(*args)
+        self.calls += 1
+        if self.calls == jit.threshold and jit.compile_procedure(self):
+            return self.compiled(*args)
+        return evaluate(self.body, Env(self.parms, args, self.env))
+
+    def deoptimize(self, args):
+        "Drop the compiled body, whose guards failed, and interpret this call."
+        self.compiled = None
+        self.calls = 0
         return evaluate(self.body, Env(self.parms, args, self.env))
@@ -1,11 +1,15 @@
 class InterpreterException(Exception):
     """Generic interpreter exception."""
 
-    def __init__(self, value: str = ''):
+    def __init__(self, value: str = '', position=None):
+        super().__init__(value)
         self.value = value
+        self.position = position
 
     def __str__(self) -> str:
         msg = self.__class__.__doc__ or ''
+        if self.position is not None:
+            msg = f'{self.position}: {msg}'
         if self.value:
             msg = msg.rstrip('.')
             if "'" in self.value:
@@ -28,6 +32,10 @@ class UnexpectedEndOfSource(ParserException):
     """Unexpected end of source code."""
 
 
+class UnknownCharacterName(ParserException):
+    """A #\\name character literal with a name that is not known."""
+
+
 class EvaluatorException(InterpreterException):
     """Exception while evaluating."""
 
@@ -40,5 +48,13 @@ class UndefinedSymbol(EvaluatorException):
     """Undefined symbol."""
 
 
+class MissingKey(EvaluatorException):
+    """Key not found in hash table."""
+
+
+class ModuleNotFound(EvaluatorException):
+    """No module with that name on the search path."""
+
+
 class QuitRequestException(Exception):
     """Signal to quit multi-line input."""
\ No newline at end of file
@@ -1,9 +1,15 @@
 
 
-from typing import Any, Protocol
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Iterable, NamedTuple, Protocol
 from .environment import Env, StandartEnv
-from .parser import tokenize, read_from_tokens
+from .exceptions import InvalidSyntax, UnexpectedEndOfSource
+from .parser import read_program
 from .evaluator import evaluate
+from .cache import ResultCache
+from . import metrics
+from .interop import bind
 
 
 class TextReader(Protocol):
@@ -11,22 +17,138 @@ class TextReader(Protocol):
         ...
 
 
+class BatchResult(NamedTuple):
+    "Outcome of one batch item: its value, or the exception it raised."
+    value: Any = None
+    error: BaseException | None = None
+
+
 def run_file(source_file: TextReader, env: Env | None = None) -> Any:
     source = source_file.read()
-    return run(source)
+    filename = getattr(source_file, 'name', '<string>')
+    return run(source, filename=filename)
 
 
-def run_lines(source: str, env: Env):
+def run_lines(source: str, env: Env, cache: ResultCache | None = None,
+              filename: str = '<string>'):
     standart_env = StandartEnv()
     if env is not None:
-        standart_env.update(env)
-    tokens = tokenize(source)
-    while tokens:
-        exp = read_from_tokens(tokens)
-        yield evaluate(exp, standart_env)
+        bind(standart_env, env)
+    evaluate_fn = evaluate if cache is None else cache.evaluate
+    forms, source_map = read_program(source, filename)
+    for exp in forms:
+        metrics.record_form()
+        try:
+            result = evaluate_fn(exp, standart_env)
+        except Exception as exc:
+            metrics.record_exception(exc)
+            source_map.annotate(exc)
+            raise
+        yield result
 
 
-def run(source: str, env: Env | None = None):
-    for result in run_lines(source, env):
+def run(source: str, env: Env | None = None,
+        cache: ResultCache | None = None, filename: str = '<string>'):
+    for result in run_lines(source, env, cache, filename):
         pass
     return result
+
+
+def eval_batch(sources: Iterable[str],
+               env: Env | None = None,
+               *,
+               workers: int = 1,
+               executor: str = 'thread') -> list[BatchResult]:
+    """Evaluate many independent expressions, returning results in order.
+
+    Every distinct source text is parsed once, so duplicates share the
+    same parsed form; each must hold exactly one expression. Each item
+    runs in its own frame on top of a shared global environment: a
+    `define` in one item is not seen by the others.
+    An item that fails to parse or evaluate yields a `BatchResult` with
+    `error` set; the remaining items still run.
+
+    With `workers` > 1 the items fan out over a thread pool, or over a
+    process pool when `executor` is 'process' (then `env` values must be
+    picklable, and an item whose result is not gets that error instead).
+    """
+    if executor not in ('thread', 'process'):
+        raise ValueError(f'unknown executor: {executor!r}')
+    sources = list(sources)
+    forms = {}
+    for source in sources:
+        if source not in forms:
+            try:
+                forms[source] = BatchResult(read_single(source))
+            except Exception as exc:
+                forms[source] = BatchResult(error=exc)
+
+    jobs = [forms[source] for source in sources]
+    if workers <= 1:
+        global_env = _batch_env(env)
+        return [_eval_batch_item(job, global_env) for job in jobs]
+
+    pool: Executor
+    if executor == 'thread':
+        global_env = _batch_env(env)
+        pool = ThreadPoolExecutor(workers)
+        with pool:
+            return list(pool.map(_eval_batch_item, jobs,
+                                 [global_env] * len(jobs)))
+    else:
+        pool = ProcessPoolExecutor(workers, initializer=_init_batch_worker,
+                                   initargs=(env,))
+        with pool:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            return list(pool.map(_eval_batch_item, jobs, chunksize=chunksize))
+
+
+def read_single(source: str) -> Any:
+    "Read source, which must hold exactly one expression."
+    forms, source_map = read_program(source)
+    if len(forms) == 1:
+        return forms[0]
+    if not forms:
+        exc = UnexpectedEndOfSource(position=source_map.position_at(len(source)))
+    else:
+        exc = InvalidSyntax(f'expected one expression, got {len(forms)}',
+                            source_map.position(forms[1]))
+    metrics.record_exception(exc)
+    raise exc
+
+
+def _batch_env(env: Env | None) -> Env:
+    global_env = StandartEnv()
+    if env is not None:
+        bind(global_env, env)
+    return global_env
+
+
+_worker_env: Env | None = None
+
+
+def _init_batch_worker(env: Env | None) -> None:
+    global _worker_env
+    _worker_env = _batch_env(env)
+
+
+def _eval_batch_item(job: BatchResult, global_env: Env | None = None) -> BatchResult:
+    if job.error is not None:
+        return job
+    in_worker = global_env is None
+    if in_worker:
+        global_env = _worker_env
+    metrics.record_form()
+    try:
+        result = BatchResult(evaluate(job.value, Env(outer=global_env)))
+    except Exception as exc:
+        metrics.record_exception(exc)
+        result = BatchResult(error=exc)
+    if in_worker:
+        # The result goes back to the parent pickled: fail this item, not
+        # the whole map, if it cannot be.
+        try:
+            pickle.dumps(result)
+        except Exception as exc:
+            result = BatchResult(error=exc)
+    return result
@@ -0,0 +1,239 @@
+"""Incremental re-evaluation of a source file that is being edited.
+
+`IncrementalRunner.run` splits the source into top-level forms and
+hashes the tokens of each one. Forms seen before are not parsed again.
+Only forms that are new or changed are evaluated, together with every
+form that reads a name one of them defines, and so on transitively.
+Passing a name to a mutating procedure (one whose name ends in `!`,
+such as `hash-set!`), or calling a procedure that does, counts as
+changing it too: every form that reads or changes that name runs
+again, in order, starting from its definition. Everything else in the
+global environment is left as it is. A name whose definition was
+deleted from the file is removed from it (or goes back to its builtin
+value); if other definitions of it remain, they run again.
+
+`watch` reruns a file this way every time it changes on disk.
+"""
+
+import hashlib
+import os
+import sys
+import time
+from bisect import bisect_right
+from typing import Any, NamedTuple
+from . import metrics
+from .environment import Env, StandartEnv
+from .evaluator import evaluate, s_expr
+from .parser import TOKEN_RE, SourceMap, read_program
+from .types import Symbol, List
+
+
+class TopLevelForm(NamedTuple):
+    "A parsed top-level form and what it defines and reads."
+    exp: Any
+    source_map: SourceMap
+    defines: frozenset
+    reads: frozenset
+    mutates: frozenset
+
+
+def split_forms(source: str) -> list[tuple[str, int, int]]:
+    "Return (digest, start, end) for every top-level form in source."
+    forms = []
+    depth = 0
+    start = 0
+    tokens = []
+    for match in TOKEN_RE.finditer(source):
+        token = match.group()
+        if depth == 0:
+            start = match.start()
+            tokens = []
+        tokens.append(token)
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        if depth <= 0:
+            digest = hashlib.blake2b('\0'.join(tokens).encode(),
+                                     digest_size=16).digest()
+            forms.append((digest, start, match.end()))
+            depth = 0
+    if depth > 0:  # unterminated: let the reader report it
+        forms.append((b'', start, len(source)))
+    return forms
+
+
+class IncrementalRunner:
+    "Keep one global environment up to date with successive versions of a file."
+
+    def __init__(self, env: Env | None = None, filename: str = '<string>'):
+        self.filename = filename
+        self.env = StandartEnv()
+        self.builtins = dict(self.env)
+        if env is not None:
+            self.env.update(env)
+            self.builtins.update(env)
+        self.forms: dict[bytes, TopLevelForm] = {}
+        self.results: dict[bytes, Any] = {}
+        self.effects: dict[bytes, frozenset] = {}
+        self.evaluated = 0  # forms evaluated by the last run
+
+    def run(self, source: str) -> list:
+        "Bring the environment up to date with source; return each form's value."
+        pieces = split_forms(source)
+        line_starts = _line_starts(source)
+        forms = {}
+        order = []
+        for digest, start, end in pieces:
+            form = self.forms.get(digest)
+            line, col = _line_col(line_starts, start)
+            if form is None or not digest:
+                form = self.read(source[start:end], line, col)
+            else:
+                form.source_map.line, form.source_map.col = line, col
+            forms[digest] = form
+            order.append(digest)
+
+        new = {digest for digest in order if digest not in self.forms}
+        effects = _effects(forms)
+        deleted = [digest for digest in self.forms if digest not in forms]
+        kept_names = set().union(*(form.defines for form in forms.values()))
+        removed = set().union(*(self.forms[digest].defines
+                                for digest in deleted)) - kept_names
+        dirty = set().union(*(self.forms[digest].defines | self.effects.get(digest, frozenset())
+                              for digest in deleted),
+                            *(forms[digest].defines | effects[digest] for digest in new))
+        rerun = set(new)
+        changed = True
+        while changed:
+            changed = False
+            for digest, form in forms.items():
+                if digest not in rerun and (form.reads | effects[digest]) & dirty:
+                    rerun.add(digest)
+                    dirty |= form.defines | effects[digest]
+                    changed = True
+
+        for name in removed:
+            if name in self.builtins:
+                self.env[name] = self.builtins[name]
+            else:
+                self.env.pop(name, None)
+        self.forms = forms
+        self.effects = effects
+        self.results = {digest: self.results[digest]
+                        for digest in order if digest in self.results}
+        self.evaluated = 0
+        results = []
+        for index, digest in enumerate(order):
+            if digest in rerun:
+                form = forms[digest]
+                self.evaluated += 1
+                metrics.record_form()
+                try:
+                    self.results[digest] = evaluate(form.exp, self.env)
+                except Exception as exc:
+                    metrics.record_exception(exc)
+                    # Forget this form and the ones not run yet, so that
+                    # the next run tries them again.
+                    for pending in order[index:]:
+                        if pending in rerun:
+                            self.forms.pop(pending, None)
+                    form.source_map.annotate(exc)
+                    raise
+            results.append(self.results.get(digest))
+        return results
+
+    def read(self, text: str, line: int, col: int) -> TopLevelForm:
+        [exp], source_map = read_program(text, self.filename, line, col)
+        defines = set()
+        if isinstance(exp, List) and len(exp) > 1 and exp[0] in ('define', 'set!'):
+            defines.add(exp[1])
+        return TopLevelForm(exp, source_map, frozenset(defines),
+                            frozenset(_symbols(exp)), frozenset(_mutated(exp)))
+
+
+def _effects(forms: dict[bytes, TopLevelForm]) -> dict[bytes, frozenset]:
+    "The names each form may mutate, itself or through the procedures it reads."
+    effects = {digest: form.mutates for digest, form in forms.items()}
+    changed = True
+    while changed:
+        changed = False
+        by_name = {}
+        for digest, form in forms.items():
+            for name in form.defines:
+                by_name.setdefault(name, set()).update(effects[digest])
+        for digest, form in forms.items():
+            names = effects[digest].union(*(by_name.get(name, ()) for name in form.reads))
+            if names != effects[digest]:
+                effects[digest] = frozenset(names)
+                changed = True
+    return effects
+
+
+def _symbols(x) -> set:
+    "Every symbol x might read; quoted data is skipped."
+    names = set()
+    stack = [x]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, Symbol):
+            names.add(x)
+        elif isinstance(x, List) and x and x[0] != 'quote':
+            stack.extend(x)
+    return names
+
+
+def _mutated(x) -> set:
+    "Every symbol x passes to set! or to a procedure whose name ends in `!`."
+    names = set()
+    stack = [x]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, List) and x and x[0] != 'quote':
+            if (len(x) > 1 and isinstance(x[0], Symbol) and x[0].endswith('!')
+                    and isinstance(x[1], Symbol)):
+                names.add(x[1])
+            stack.extend(x)
+    return names
+
+
+def _line_starts(source: str) -> list[int]:
+    starts = [0]
+    index = source.find('\n')
+    while index != -1:
+        starts.append(index + 1)
+        index = source.find('\n', index + 1)
+    return starts
+
+
+def _line_col(line_starts: list[int], offset: int) -> tuple[int, int]:
+    line = bisect_right(line_starts, offset)
+    return line, offset - line_starts[line - 1] + 1
+
+
+def watch(path: str, interval: float = 0.5, env: Env | None = None) -> None:
+    "Rerun path incrementally whenever it changes, until interrupted."
+    runner = IncrementalRunner(env, path)
+    mtime = None
+    try:
+        while True:
+            current = os.stat(path).st_mtime_ns
+            if current != mtime:
+                mtime = current
+                with open(path) as file:
+                    source = file.read()
+                try:
+                    results = runner.run(source)
+                except Exception as exc:
+                    print(f'{type(exc).__name__}: {exc}', file=sys.stderr)
+                    for note in getattr(exc, '__notes__', ()):
+                        print(note, file=sys.stderr)
+                else:
+                    for result in results:
+                        if result is not None:
+                            print(s_expr(result))
+                    print(f';; {runner.evaluated} of {len(results)} forms evaluated',
+                          file=sys.stderr)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
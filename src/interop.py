@@ -0,0 +1,189 @@
+"""Conversion between Python values and Lisp values.
+
+`to_lisp` is what `run(source, env)` applies to the values in env, and
+`to_python` is its inverse for results. Neither walks or copies large
+data when it can help it:
+
+- lists of numbers, strings and other atoms are already Lisp lists
+  and are passed through as they are; a list holding anything else
+  (tuples, bytes, dicts, other lists) is checked one level deep and
+  served as a `SequenceView` of itself, printed as a list, so its items
+  are converted when they are read;
+- bytes, bytearrays, array.arrays and anything else that exports a
+  1-D buffer become a `Vector` over a memoryview of the same memory
+  (bytes print as `#u8(...)`, other vectors as `#(...)`);
+- tuples and other sequences become a `SequenceView`, which converts
+  an element only when it is read, so nested tuples are wrapped one
+  level at a time;
+- dicts are copied into a `HashTable`.
+
+Vectors made by Lisp code, with `vector` or `list->vector`, are a
+`MutableVector`: a view of a list of Lisp values that `vector-set!` can
+set to anything. Host data keeps its typed views.
+
+Slicing a `Vector` or a `SequenceView`, which is what `cdr` does, makes
+another view instead of a copy. Otherwise views behave as the lists of
+their items: they are equal to such lists, find what was stored under
+one in a hash table, and `cons` and `append` copy them into one.
+`to_python` hands back the memoryview of a vector, the underlying
+sequence of a view and a dict for a hash table; everything else, lists
+included, comes back unchanged.
+"""
+
+from array import array
+from collections.abc import Sequence
+from typing import Any
+from .types import HashTable, ListView
+
+_PLAIN = (int, float, complex, str, HashTable)
+
+
+class Vector(ListView):
+    "A fixed-length vector of numbers that shares the memory of a Python buffer."
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        view = memoryview(data)
+        if view.ndim != 1:
+            view = view.cast('B').cast(view.format)
+        self.data = view
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Vector(self.data[index])
+        return self.data[index]
+
+    def __setitem__(self, index: int, value) -> None:
+        self.data[index] = value
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Vector):
+            return self.data == other.data
+        return _equal_items(self, other)
+
+    __hash__ = None  # the memory may change: use hash_key
+
+    def tolist(self) -> list:
+        return self.data.tolist()
+
+    def __repr__(self) -> str:
+        from .printer import lisp_str
+        return lisp_str(self)
+
+
+class SequenceView(ListView):
+    "A read-only Lisp view of a Python sequence, converting items as they are read."
+    __slots__ = ('items', 'indices')
+
+    def __init__(self, items: Sequence, indices: range | None = None):
+        self.items = items
+        self.indices = range(len(items)) if indices is None else indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SequenceView(self.items, self.indices[index])
+        return to_lisp(self.items[self.indices[index]])
+
+    def __iter__(self):
+        items = self.items
+        for index in self.indices:
+            yield to_lisp(items[index])
+
+    def __eq__(self, other) -> bool:
+        return _equal_items(self, other)
+
+    __hash__ = None  # like the lists it stands for
+
+    def tolist(self) -> list:
+        return list(self)
+
+    def __repr__(self) -> str:
+        from .printer import lisp_str
+        return lisp_str(self)
+
+
+class MutableVector(SequenceView):
+    "A vector made by Lisp code: a list of Lisp values, which vector-set! can change."
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MutableVector(self.items, self.indices[index])
+        return self.items[self.indices[index]]
+
+    def __setitem__(self, index: int, value) -> None:
+        self.items[self.indices[index]] = value
+
+    def __iter__(self):
+        items = self.items
+        return (items[index] for index in self.indices)
+
+
+_ATOMS = _PLAIN + (Vector, SequenceView)
+
+
+def _equal_items(view: ListView, other) -> bool:
+    if not isinstance(other, (list, ListView)):
+        return NotImplemented
+    return len(view) == len(other) and all(a == b for a, b in zip(view, other))
+
+
+def as_list(x):
+    "x itself if it is a list; the list of its items if it is a view."
+    return x.tolist() if isinstance(x, ListView) else x
+
+
+def to_lisp(x: Any) -> Any:
+    "The Lisp value for the Python value x, sharing its memory where possible."
+    if isinstance(x, list):
+        return x if all(isinstance(item, _ATOMS) for item in x) else SequenceView(x)
+    elif isinstance(x, _PLAIN) or callable(x):
+        return x
+    elif isinstance(x, (Vector, SequenceView)):
+        return x
+    elif isinstance(x, dict):
+        return HashTable(x.items())
+    elif isinstance(x, (bytes, bytearray, memoryview, array)):
+        return Vector(x)
+    elif isinstance(x, Sequence):
+        return SequenceView(x)
+    try:
+        return Vector(x)  # anything else exporting a buffer, e.g. numpy arrays
+    except (TypeError, NotImplementedError):
+        return x
+
+
+def to_python(x: Any) -> Any:
+    "The Python value for the Lisp value x; the inverse of to_lisp."
+    if isinstance(x, Vector):
+        return x.data
+    elif isinstance(x, SequenceView):
+        if x.indices == range(len(x.items)):
+            return x.items
+        return [x.items[index] for index in x.indices]
+    elif isinstance(x, HashTable):
+        return {_python_key(key): to_python(value) for key, value in x.items()}
+    return x
+
+
+def bind(env: dict, values: dict) -> None:
+    "Define every name in values in env, converting the values to Lisp."
+    env.update({name: to_lisp(value) for name, value in values.items()})
+
+
+def make_vector(items) -> MutableVector:
+    "A vector of items for Lisp code; it can be set to any value."
+    return MutableVector(list(items))
+
+
+def _python_key(key):
+    return tuple(map(_python_key, key)) if isinstance(key, list) else key
@@ -0,0 +1,183 @@
+"""Compile hot procedures to Python functions.
+
+Every `Procedure` counts its calls. When the count reaches `threshold`,
+its body is translated to Python source: parameters become locals,
+`if` becomes a conditional expression, and every free variable is read
+straight from the frame that binds it, with no walk up the environment
+chain. Values copied into a closure, which never change, are used
+directly. The source is compiled and the result replaces the
+interpreted body.
+
+Free variables are read at every use, since any procedure the body
+calls may `set!` them. Guards at the top of the generated function check
+that each one is still bound in the frame it was found in. If not, the
+procedure goes back to `evaluate` and may be compiled again later.
+Bodies that use define, set!, lambda or the stream special forms are
+not compiled. An exception leaving a compiled body records the body as
+a Lisp frame, as `evaluate` would.
+
+Set LISPY_JIT=0 (or `jit.enabled = False`) to turn it off, and
+LISPY_JIT_DUMP=1 to print the generated code to stderr; `dump(proc)`
+returns it.
+"""
+
+import os
+import sys
+from . import evaluator
+from .environment import Closure
+from .types import Symbol, List
+
+enabled = os.environ.get('LISPY_JIT', '1') != '0'
+threshold = 100
+dump_to_stderr = os.environ.get('LISPY_JIT_DUMP', '0') != '0'
+
+SPECIAL_FORMS = frozenset({'define', 'set!', 'lambda', 'delay', 'stream-cons',
+                           'stream-for-each', 'stream-fold'})
+
+
+class NotCompilable(Exception):
+    """The procedure uses something the compiler does not translate."""
+
+
+def compile_procedure(proc) -> bool:
+    "Try to replace proc's body by a compiled function; return True on success."
+    if not enabled:
+        return False
+    try:
+        source, namespace = translate(proc)
+    except NotCompilable:
+        return False
+    code = compile(source, f'<lispy-jit {id(proc):#x}>', 'exec')
+    exec(code, namespace)
+    compiled = namespace['jitted']
+    compiled.source = source
+    proc.compiled = compiled
+    if dump_to_stderr:
+        print(source, file=sys.stderr)
+    return True
+
+
+def dump(proc) -> str | None:
+    "The Python source proc was compiled to, if it is compiled."
+    return getattr(proc.compiled, 'source', None)
+
+
+def translate(proc) -> tuple[str, dict]:
+    "Return the Python source for proc and the globals it runs with."
+    return _Translator(proc).translate()
+
+
+class _Translator:
+
+    def __init__(self, proc):
+        self.proc = proc
+        self.namespace = {'fallback': proc.deoptimize,
+                          'record_frame': evaluator.record_frame}
+        self.globals = {}   # Lisp name -> Python name of its snapshot
+        self.guards = []
+        if isinstance(proc.parms, Symbol):
+            self.locals = {proc.parms: 'p0'}
+            self.signature = '*p0'
+        else:
+            self.locals = {parm: f'p{i}' for i, parm in enumerate(proc.parms)}
+            self.signature = ', '.join(self.locals.values())
+            if len(self.locals) != len(proc.parms):
+                raise NotCompilable('repeated parameter')
+
+    def translate(self) -> tuple[str, dict]:
+        body = self.expr(self.proc.body)
+        lines = [f'def jitted({self.signature}):']
+        if self.guards:
+            lines.append(f'    if not ({" and ".join(self.guards)}):')
+            if isinstance(self.proc.parms, Symbol):
+                args = 'p0'
+            else:
+                args = f'({self.signature},)' if self.signature else '()'
+            lines.append(f'        return fallback({args})')
+        if isinstance(self.proc.parms, Symbol):
+            lines.append('    p0 = list(p0)')
+        lines.append('    try:')
+        lines.append(f'        return {body}')
+        lines.append('    except Exception as exc:')
+        lines.append(f'        record_frame(exc, {self.const(self.proc.body)})')
+        lines.append('        raise')
+        return '\n'.join(lines) + '\n', self.namespace
+
+    def expr(self, x) -> str:
+        if isinstance(x, Symbol):
+            return self.locals.get(x) or self.free(x)
+        elif type(x) is int:
+            return repr(x)
+        elif not isinstance(x, List):
+            return self.const(x)
+        elif not x:
+            raise NotCompilable('()')
+        elif x[0] == 'quote':
+            (_, exp) = _unpack(x, 2)
+            return self.const(exp)
+        elif x[0] == 'if':
+            (_, test, conseq, alt) = _unpack(x, 4)
+            return (f'({self.expr(conseq)} if {self.expr(test)} '
+                    f'else {self.expr(alt)})')
+        elif isinstance(x[0], Symbol) and x[0] in SPECIAL_FORMS:
+            raise NotCompilable(x[0])
+        else:
+            args = ', '.join(self.expr(exp) for exp in x[1:])
+            return f'{self.expr(x[0])}({args})'
+
+    def const(self, value) -> str:
+        name = f'c{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+    def free(self, var: str) -> str:
+        "Python code reading a free variable, guarding where it is bound."
+        name = self.globals.get(var)
+        if name is not None:
+            return name
+        try:
+            self.proc.env.find(var)  # runs a lazy module definition or import
+        except LookupError:
+            raise NotCompilable(var)
+        env, unbound = self.proc.env, []
+        while True:
+            if var in env:
+                frame = env
+                break
+            if isinstance(env, Closure):
+                frame = env.frames.get(var)
+                if frame is not None:
+                    break
+            else:
+                unbound.append(env)
+            env = env.outer
+            if env is None:  # imported from a module
+                frame = None
+                break
+        key = self.const(var)
+        if isinstance(frame, Closure):
+            # Closure copies never change: use the value itself.
+            value = frame[var]
+            for env in unbound:
+                self.guards.append(f'{key} not in {self.const(env)}')
+            name = 'jitted' if value is self.proc else self.const(value)
+        elif frame is None or unbound:
+            # Imported, or a frame in between could define it while we run.
+            name = f'{self.const(self.proc.env)}.find({key})[{key}]'
+        else:
+            # Read it on every use: a procedure called from the body may
+            # set! it. The guard only checks it is still bound there.
+            value = frame[var]
+            frame_name = self.const(frame)
+            self.guards.append(f'{key} in {frame_name}')
+            name = f'{frame_name}[{key}]'
+            if value is self.proc:  # call ourselves directly while we can
+                name = f'(jitted if {name} is {self.const(value)} else {name})'
+        self.globals[var] = name
+        return name
+
+
+def _unpack(x: List, length: int) -> List:
+    if len(x) != length:
+        raise NotCompilable(x[0])
+    return x
@@ -0,0 +1,198 @@
+"""Evaluation metrics for embedded interpreters.
+
+    registry = metrics.enable()
+    run(source)
+    registry.snapshot()     # a dict
+    registry.prometheus()   # Prometheus text exposition format
+
+While metrics are disabled nothing in the evaluator checks for them:
+`enable` swaps counting versions of `evaluate` (in every module that
+imported it), `Procedure.__call__`, frame creation and `Env.find` into
+place and turns the JIT off, since compiled procedures call themselves
+without going through any of those; `disable` puts the originals back.
+
+Parse time is recorded by `read_program`, and top-level forms and the
+exceptions they raise by everything that evaluates them (`run`,
+`eval_batch`, the REPL server, incremental runs and module loading),
+through the module-level `active` registry. Items that `eval_batch`
+sends to a process pool are counted in that process.
+"""
+
+import sys
+from collections import Counter
+from . import evaluator, jit
+from .environment import Env, Closure
+
+BUCKETS = (0, 1, 2, 4, 8, 16)
+
+active: 'MetricsRegistry | None' = None
+
+_originals: dict = {}
+
+
+class MetricsRegistry:
+    "Counters describing what the interpreter has been doing."
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.forms_evaluated = 0
+        self.evaluations = 0
+        self.procedure_calls = 0
+        self.frames_allocated = 0
+        self.find_depth = Counter()
+        self.parses = 0
+        self.parse_seconds = 0.0
+        self.exceptions = Counter()
+
+    def snapshot(self) -> dict:
+        return {
+            'forms_evaluated': self.forms_evaluated,
+            'evaluations': self.evaluations,
+            'procedure_calls': self.procedure_calls,
+            'frames_allocated': self.frames_allocated,
+            'find_depth': dict(sorted(self.find_depth.items())),
+            'parses': self.parses,
+            'parse_seconds': self.parse_seconds,
+            'exceptions': dict(self.exceptions),
+        }
+
+    def prometheus(self, prefix: str = 'lispy') -> str:
+        lines = []
+
+        def counter(name, help_text, value):
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} counter')
+            lines.append(f'{prefix}_{name} {value}')
+
+        counter('forms_evaluated_total', 'Top-level forms evaluated.',
+                self.forms_evaluated)
+        counter('evaluations_total', 'Calls to evaluate.', self.evaluations)
+        counter('procedure_calls_total', 'Calls to user procedures.',
+                self.procedure_calls)
+        counter('frames_allocated_total', 'Environment frames created.',
+                self.frames_allocated)
+
+        name = f'{prefix}_env_find_depth'
+        lines.append(f'# HELP {name} Frames searched by Env.find.')
+        lines.append(f'# TYPE {name} histogram')
+        for bound in BUCKETS:
+            count = sum(n for depth, n in self.find_depth.items() if depth <= bound)
+            lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+        total = sum(self.find_depth.values())
+        lines.append(f'{name}_bucket{{le="+Inf"}} {total}')
+        lines.append(f'{name}_sum {sum(d * n for d, n in self.find_depth.items())}')
+        lines.append(f'{name}_count {total}')
+
+        name = f'{prefix}_parse_seconds'
+        lines.append(f'# HELP {name} Time spent reading source.')
+        lines.append(f'# TYPE {name} summary')
+        lines.append(f'{name}_sum {self.parse_seconds}')
+        lines.append(f'{name}_count {self.parses}')
+
+        name = f'{prefix}_exceptions_total'
+        lines.append(f'# HELP {name} Exceptions raised out of top-level forms.')
+        lines.append(f'# TYPE {name} counter')
+        for cls, count in sorted(self.exceptions.items()):
+            lines.append(f'{name}{{class="{cls}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def enable(registry: MetricsRegistry | None = None) -> MetricsRegistry:
+    "Start counting into registry (a new one by default) and return it."
+    global active
+    disable()
+    registry = registry if registry is not None else MetricsRegistry()
+    Procedure = evaluator.Procedure
+    evaluate, call = evaluator.evaluate, Procedure.__call__
+    # Modules that did `from .evaluator import evaluate` make the
+    # top-level call of every form.
+    package = __name__.rpartition('.')[0]
+    importers = [module for name, module in list(sys.modules.items())
+                 if name.startswith(package + '.')
+                 and vars(module).get('evaluate') is evaluate]
+    _originals.update(evaluate=evaluate, Env=evaluator.Env, call=call,
+                      find=Env.find, importers=importers, jit=jit.enabled)
+
+    def counting_evaluate(x, env):
+        registry.evaluations += 1
+        return evaluate(x, env)
+
+    def counting_call(self, *args):
+        registry.procedure_calls += 1
+        return call(self, *args)
+
+    def counting_env(parms=(), args=(), outer=None):
+        registry.frames_allocated += 1
+        return Env(parms, args, outer)
+
+    def counting_find(self, var):
+        "Find the innermost Env where var appears."
+        env, depth = self, 0
+        while var not in env:
+            if isinstance(env, Closure):
+                if var in env.frames:
+                    env = env.frames[var]
+                    break
+            elif type(env).find is not counting_find:  # a module, say
+                registry.find_depth[depth] += 1
+                return env.find(var)
+            if env.outer is None:
+                registry.find_depth[depth] += 1
+                return _find_import(self, var)
+            env, depth = env.outer, depth + 1
+        registry.find_depth[depth] += 1
+        return env
+
+    for module in importers:
+        module.evaluate = counting_evaluate
+    evaluator.Env = counting_env
+    Procedure.__call__ = counting_call
+    Env.find = counting_find
+    jit.enabled = False
+    active = registry
+    return registry
+
+
+def disable() -> None:
+    "Stop counting and restore the uninstrumented interpreter."
+    global active
+    if not _originals:
+        return
+    for module in _originals['importers']:
+        module.evaluate = _originals['evaluate']
+    evaluator.Env = _originals['Env']
+    evaluator.Procedure.__call__ = _originals['call']
+    Env.find = _originals['find']
+    jit.enabled = _originals['jit']
+    _originals.clear()
+    active = None
+
+
+def _find_import(env, var):
+    "Env.find once no frame binds var: try modules, the outermost first."
+    frames = []
+    while env is not None:
+        frames.append(env)
+        env = env.outer
+    for env in reversed(frames):
+        if isinstance(env, Env) and any(var in module.exports for module in env.imports):
+            return env.find_import(var)
+    raise LookupError(var)
+
+
+def record_parse(seconds: float) -> None:
+    if active is not None:
+        active.parses += 1
+        active.parse_seconds += seconds
+
+
+def record_form() -> None:
+    if active is not None:
+        active.forms_evaluated += 1
+
+
+def record_exception(exc: BaseException) -> None:
+    if active is not None:
+        active.exceptions[type(exc).__name__] += 1
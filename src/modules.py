@@ -0,0 +1,222 @@
+"""Modules loaded with `(require "name")`.
+
+A module is a source file found on `search_path` (the directories in
+LISPY_PATH, then the current directory; `.scm` is added to names without
+an extension). It is read once per process: requiring it again, from
+anywhere, returns the same `Module`. Set LISPY_MODULE_CACHE=1 to also
+keep the parsed forms, as JSON, in a `__lispycache__` directory next to
+the source, so later processes skip the parser while the file is
+unchanged.
+
+A `(define name ...)` whose value is a lambda or a constant, and which
+is the only definition of name, is kept unevaluated and runs the first
+time name is looked up, so the cost of a require grows with what is
+used rather than with the size of the module. Every other form runs in
+order when the module is loaded: evaluating those later could give a
+different value. Requiring a module makes its definitions visible in
+the requiring environment; they are looked up in the module on every
+use, so a set! made in it is seen. Modules are shared by every thread
+(every server session, say), so loading a module and running a deferred
+definition take a lock.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from typing import Any
+from . import metrics
+from .environment import Env, StandartEnv
+from .evaluator import evaluate
+from .exceptions import ModuleNotFound
+from .parser import SourceMap, read_program
+from .types import Symbol, Char, List, intern
+
+EXTENSION = '.scm'
+CACHE_DIR = '__lispycache__'
+
+search_path = [path for path in os.environ.get('LISPY_PATH', '').split(os.pathsep)
+               if path] + ['.']
+write_artifacts = os.environ.get('LISPY_MODULE_CACHE', '0') != '0'
+
+_modules: dict[str, 'Module'] = {}
+_base: Env | None = None
+_lock = threading.RLock()
+
+
+class Module(Env):
+    "The global environment of a module, with its definitions evaluated on demand."
+
+    def __init__(self, name: str, path: str, forms: list,
+                 source_map: SourceMap | None, outer: Env):
+        super().__init__(outer=outer)
+        self.name = name
+        self.path = path
+        self.source_map = source_map
+        self.pending = {}  # name -> define form not evaluated yet
+        self.body = []
+        defined = Counter(_defined_name(exp) for exp in forms)
+        for exp in forms:
+            name = _defined_name(exp)
+            if name is not None and defined[name] == 1 and _deferrable(exp[2]):
+                self.pending[name] = exp
+            else:
+                self.body.append(exp)
+        self.exports = frozenset(name for name in defined if name is not None)
+        self['require'] = lambda name: require(name, self)
+
+    def find(self, var):
+        "Find var here, evaluating its definition the first time it is needed."
+        if var in self:
+            return self
+        if var in self.pending:
+            with _lock:
+                # Unless another thread ran it while we waited. It is only
+                # dropped once it ran, so a failing definition fails again.
+                if var in self.pending:
+                    self.run(self.pending[var])
+                    del self.pending[var]
+            return self
+        for module in self.imports:
+            if var in module.exports:
+                return module.find(var)
+        return self.outer.find(var)
+
+    def load(self) -> None:
+        "Run the forms that are not deferred, in order."
+        body, self.body = self.body, []
+        for exp in body:
+            self.run(exp)
+
+    def run(self, exp) -> Any:
+        # An error is counted by the form that required the module or
+        # looked the name up, not here as well.
+        metrics.record_form()
+        try:
+            return evaluate(exp, self)
+        except Exception as exc:
+            if self.source_map is not None:
+                self.source_map.annotate(exc)
+            raise
+
+    def __repr__(self) -> str:
+        return f'#<module {self.name}>'
+
+
+def _defined_name(exp) -> Symbol | None:
+    if (isinstance(exp, List) and len(exp) == 3 and exp[0] == 'define'
+            and isinstance(exp[1], Symbol)):
+        return exp[1]
+    return None
+
+
+def _deferrable(x) -> bool:
+    "Whether evaluating x later gives the same value as evaluating it now."
+    if isinstance(x, List):
+        return bool(x) and x[0] in ('lambda', 'quote')
+    return not isinstance(x, Symbol)
+
+
+def require(name: str, env: Env) -> None:
+    "Load module name if needed and make its definitions visible in env."
+    module = load(name)
+    if module is not env and module not in env.imports:
+        env.imports = env.imports + (module,)
+
+
+def load(name: str) -> Module:
+    "Return module name, reading it the first time it is required."
+    path = find_module(name)
+    with _lock:
+        module = _modules.get(path)
+        if module is None:
+            forms, source_map = read_module(path)
+            # Registered before its body runs, so modules may require each other.
+            module = _modules[path] = Module(name, path, forms, source_map, base_env())
+            module.load()
+    return module
+
+
+def find_module(name: str) -> str:
+    "The real path of the file module name is read from."
+    filename = name if os.path.splitext(name)[1] else name + EXTENSION
+    if os.path.isabs(filename):
+        candidates = [filename]
+    else:
+        candidates = [os.path.join(directory, filename) for directory in search_path]
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return os.path.realpath(candidate)
+    raise ModuleNotFound(name)
+
+
+def read_module(path: str) -> tuple[list, SourceMap | None]:
+    "Parse path, going through its on-disk artifact when those are enabled."
+    with open(path) as file:
+        source = file.read()
+    if not write_artifacts:
+        return read_program(source, path)
+    digest = hashlib.blake2b(source.encode(), digest_size=16).hexdigest()
+    directory, filename = os.path.split(path)
+    artifact = os.path.join(directory, CACHE_DIR, filename + '.json')
+    try:
+        with open(artifact) as file:
+            saved = json.load(file)
+        if saved['digest'] == digest:
+            source_map = SourceMap(source, path)
+            return [_decode(x, source_map) for x in saved['forms']], source_map
+    except (OSError, ValueError, LookupError, TypeError):
+        pass  # missing, stale or damaged: read the source again
+    forms, source_map = read_program(source, path)
+    try:
+        os.makedirs(os.path.dirname(artifact), exist_ok=True)
+        with open(artifact, 'w') as file:
+            json.dump({'digest': digest,
+                       'forms': [_encode(x, source_map) for x in forms]}, file)
+    except OSError:
+        pass  # the artifact is only an optimization
+    return forms, source_map
+
+
+# In an artifact a list is a JSON array starting with its offset in the
+# source, a symbol is a JSON string, and strings and characters are
+# tagged objects. Numbers are themselves.
+
+def _encode(x, source_map: SourceMap):
+    if isinstance(x, List):
+        return [source_map.offsets[id(x)][1]] + [_encode(y, source_map) for y in x]
+    elif isinstance(x, Symbol):
+        return str(x)
+    elif isinstance(x, Char):
+        return {'char': str(x)}
+    elif isinstance(x, str):
+        return {'string': x}
+    return x
+
+
+def _decode(x, source_map: SourceMap):
+    if isinstance(x, list):
+        form = [_decode(y, source_map) for y in x[1:]]
+        source_map.add(form, x[0])
+        return form
+    elif isinstance(x, str):
+        return intern(x)
+    elif isinstance(x, dict):
+        return Char(x['char']) if 'char' in x else x['string']
+    elif type(x) in (int, float):
+        return x
+    raise TypeError(f'not a form: {x!r}')
+
+
+def base_env() -> Env:
+    "The builtins every module's environment sits on."
+    global _base
+    if _base is None:
+        _base = StandartEnv()
+    return _base
+
+
+def clear() -> None:
+    "Forget every loaded module."
+    _modules.clear()
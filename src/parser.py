@@ -1,5 +1,88 @@
+import re
+import time
+from bisect import bisect_right
+from typing import NamedTuple
+from . import metrics
+from .environment import to_string
+from .exceptions import InterpreterException, UnexpectedCloseParen, UnexpectedEndOfSource
 from .types import atom, Symbol
 
+# Characters (#\x), strings (the closing quote is optional so that atom
+# can report unterminated ones), parens, and everything else.
+TOKEN_RE = re.compile(r'#\\.[^\s()"]*|"(?:\\.|[^\\"])*"?|[()]|[^\s()"]+', re.DOTALL)
+
+
+class Position(NamedTuple):
+    "A place in the source, printed as file:line:col."
+    filename: str
+    line: int
+    col: int
+
+    def __str__(self) -> str:
+        return f'{self.filename}:{self.line}:{self.col}'
+
+
+class SourceMap:
+    """Side table mapping the lists built by the reader to source positions.
+
+    Forms are plain lists, exactly as `parse` returns them, so evaluation
+    does not pay for the bookkeeping. Positions are looked up by object
+    identity and line/column are only worked out when asked for.
+    """
+
+    def __init__(self, source: str, filename: str = '<string>',
+                 line: int = 1, col: int = 1):
+        self.source = source
+        self.filename = filename
+        self.line = line  # where source starts within filename
+        self.col = col
+        self.offsets: dict[int, tuple[list, int]] = {}
+        self._line_starts: list[int] | None = None
+
+    def add(self, form: list, offset: int) -> None:
+        # Keep the form alive so its id is not reused by another object.
+        self.offsets[id(form)] = (form, offset)
+
+    def position(self, form) -> Position | None:
+        "Return where form starts, or None if the reader did not build it."
+        entry = self.offsets.get(id(form))
+        if entry is None or entry[0] is not form:
+            return None
+        return self.position_at(entry[1])
+
+    def position_at(self, offset: int) -> Position:
+        if self._line_starts is None:
+            self._line_starts = [0] + [m.end() for m in re.finditer('\n', self.source)]
+        line = bisect_right(self._line_starts, offset)
+        col = offset - self._line_starts[line - 1] + 1
+        if line == 1:
+            col += self.col - 1
+        return Position(self.filename, line + self.line - 1, col)
+
+    def traceback(self, exc: BaseException) -> list[str]:
+        "Describe the Lisp forms exc passed through, outermost first."
+        lines = []
+        for form in reversed(getattr(exc, 'lisp_frames', ())):
+            position = self.position(form)
+            if position is not None:
+                lines.append(f'{position}: {_abbreviate(to_string(form))}')
+        return lines
+
+    def annotate(self, exc: BaseException) -> None:
+        "Attach the failing position and the Lisp traceback to exc."
+        frames = [form for form in getattr(exc, 'lisp_frames', ())
+                  if self.position(form) is not None]
+        if not frames:
+            return
+        if isinstance(exc, InterpreterException) and exc.position is None:
+            exc.position = self.position(frames[0])
+        exc.add_note('Lisp traceback (most recent call last):\n  '
+                     + '\n  '.join(self.traceback(exc)))
+
+
+def _abbreviate(text: str, width: int = 60) -> str:
+    return text if len(text) <= width else text[:width - 3] + '...'
+
 
 def parse(program):
     "Read a Scheme expression from a string."
@@ -8,7 +91,7 @@ def parse(program):
 
 def tokenize(s):
     "Convert a string into a list of tokens."
-    return s.replace('(', ' ( ').replace(')', ' ) ').split()
+    return TOKEN_RE.findall(s)
 
 
 def read_from_tokens(tokens):
@@ -26,3 +109,59 @@ def read_from_tokens(tokens):
         raise SyntaxError('unexpected )')
     else:
         return atom(token)
+
+
+def read_program(source: str, filename: str = '<string>',
+                 line: int = 1, col: int = 1) -> tuple[list, SourceMap]:
+    """Read every expression in source, recording where each list starts.
+
+    line and col say where source begins, when it is a piece of filename.
+    While metrics are enabled, the time it takes, or the error it raises,
+    is recorded.
+    """
+    if metrics.active is None:
+        return _read_program(source, filename, line, col)
+    started = time.perf_counter()
+    try:
+        result = _read_program(source, filename, line, col)
+    except Exception as exc:
+        metrics.record_exception(exc)
+        raise
+    metrics.record_parse(time.perf_counter() - started)
+    return result
+
+
+def _read_program(source, filename, line, col):
+    source_map = SourceMap(source, filename, line, col)
+    tokens = [(m.group(), m.start()) for m in TOKEN_RE.finditer(source)]
+    forms = []
+    index = 0
+    while index < len(tokens):
+        exp, index = _read_at(tokens, index, source_map)
+        forms.append(exp)
+    return forms, source_map
+
+
+def _read_at(tokens, index, source_map):
+    token, offset = tokens[index]
+    if '(' == token:
+        L = []
+        index += 1
+        while True:
+            if index == len(tokens):
+                raise UnexpectedEndOfSource(
+                    position=source_map.position_at(offset))
+            if tokens[index][0] == ')':
+                break
+            exp, index = _read_at(tokens, index, source_map)
+            L.append(exp)
+        source_map.add(L, offset)
+        return L, index + 1
+    elif ')' == token:
+        raise UnexpectedCloseParen(token, source_map.position_at(offset))
+    else:
+        try:
+            return atom(token), index + 1
+        except InterpreterException as exc:
+            exc.position = source_map.position_at(offset)
+            raise
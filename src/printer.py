@@ -0,0 +1,172 @@
+"""Iterative s-expression printer.
+
+`write` walks nested lists with an explicit stack instead of recursion,
+so deeply nested results cannot hit the recursion limit, and it hands
+text to the sink in chunks instead of building one big string. Lists
+that contain themselves are printed with datum labels, as in
+`#0=(1 2 #0#)`; with shared=True every list reached more than once is
+labelled.
+"""
+
+import io
+from typing import Protocol
+from .types import Symbol, Char, String, HashTable, CHAR_NAMES
+from .interop import Vector, SequenceView
+
+CHUNK = 4096
+
+_END = object()
+
+CHAR_SPELLINGS = {char: name for name, char in CHAR_NAMES.items()}
+STRING_ESCAPES = str.maketrans({'\\': '\\\\', '"': '\\"', '\n': '\\n', '\t': '\\t'})
+
+
+class TextWriter(Protocol):
+    def write(self, text: str) -> object:
+        ...
+
+
+def lisp_str(obj: object, *, shared: bool = False) -> str:
+    "Convert a Python object into a Lisp-readable string."
+    buffer = io.StringIO()
+    write(obj, buffer, shared=shared)
+    return buffer.getvalue()
+
+
+def write(obj: object, sink: TextWriter, *, shared: bool = False) -> None:
+    "Write obj to sink as an s-expression."
+    labels = find_labels(obj, shared) if isinstance(obj, (list, HashTable)) else {}
+    next_label = 0
+    out = []
+    stack = []   # iterators over the lists being printed
+    spaced = []  # whether the list on top of stack needs a separator
+    item = obj
+    while True:
+        # ___________________________________________ Emit one item
+        if isinstance(item, (list, HashTable)):
+            label = labels.get(id(item), _END)
+            if label is None:
+                labels[id(item)] = label = next_label
+                next_label += 1
+                out.append(f'#{label}=')
+            elif label is not _END:
+                out.append(f'#{label}#')
+                item = _END
+            if item is _END:
+                pass
+            elif isinstance(item, HashTable):
+                out.append('#hash(')
+                stack.append([key, value] for key, value in item.items())
+                spaced.append(False)
+            elif is_flat_numbers(item):
+                out.append('(')
+                sink.write(''.join(out))
+                out.clear()
+                _write_numbers(item, sink)
+                out.append(')')
+            else:
+                out.append('(')
+                stack.append(iter(item))
+                spaced.append(False)
+        elif isinstance(item, Vector):
+            out.append('#u8(' if item.data.format == 'B' else '#(')
+            sink.write(''.join(out))
+            out.clear()
+            _write_numbers(item.data, sink)
+            out.append(')')
+        elif isinstance(item, SequenceView):
+            # A view of a host list stands for that list.
+            host_list = type(item) is SequenceView and isinstance(item.items, list)
+            out.append('(' if host_list else '#(')
+            stack.append(iter(item))
+            spaced.append(False)
+        else:
+            out.append(atom_str(item))
+        if len(out) >= CHUNK:
+            sink.write(''.join(out))
+            out.clear()
+
+        # ___________________________________________ Find the next one
+        item = _END
+        while stack:
+            item = next(stack[-1], _END)
+            if item is not _END:
+                if spaced[-1]:
+                    out.append(' ')
+                else:
+                    spaced[-1] = True
+                break
+            stack.pop()
+            spaced.pop()
+            out.append(')')
+        if item is _END:
+            break
+    sink.write(''.join(out))
+
+
+def atom_str(x: object) -> str:
+    "Print anything that is not a list."
+    if x is True:
+        return '#t'
+    elif x is False:
+        return '#f'
+    elif isinstance(x, Symbol):
+        return x
+    elif isinstance(x, Char):
+        return '#\\' + CHAR_SPELLINGS.get(x, x)
+    elif isinstance(x, String):
+        return '"' + x.translate(STRING_ESCAPES) + '"'
+    elif isinstance(x, complex):
+        return str(x).replace('j', 'i')
+    else:
+        return str(x)
+
+
+def is_flat_numbers(L: list) -> bool:
+    "True if every item of L is an int or a float (but not a bool)."
+    return all(type(x) is int or type(x) is float for x in L)
+
+
+def _write_numbers(L: list | memoryview, sink: TextWriter) -> None:
+    for start in range(0, len(L), CHUNK):
+        if start:
+            sink.write(' ')
+        chunk = L[start:start + CHUNK]
+        if isinstance(chunk, memoryview):
+            chunk = chunk.tolist()
+        sink.write(' '.join(map(repr, chunk)))
+
+
+def find_labels(obj: list, shared: bool = False) -> dict[int, None]:
+    """Return the ids of the lists in obj that need a datum label.
+
+    Those are the lists (and hash tables) that contain themselves, plus,
+    when shared is true, the ones that are reached more than once.
+    """
+    labels = {}
+    seen = {id(obj)}
+    path = {id(obj)}
+    stack = [(obj, _children(obj))]
+    while stack:
+        parent, items = stack[-1]
+        for child in items:
+            if not isinstance(child, (list, HashTable)):
+                continue
+            key = id(child)
+            if key in path or (shared and key in seen):
+                labels[key] = None
+            elif key not in seen:
+                seen.add(key)
+                path.add(key)
+                stack.append((child, _children(child)))
+                break
+        else:
+            path.discard(id(parent))
+            stack.pop()
+    return labels
+
+
+def _children(x):
+    if isinstance(x, HashTable):
+        return (item for pair in x.items() for item in pair)
+    return iter(x)
@@ -0,0 +1,130 @@
+"""Time spent in each Lisp procedure, reported by source position.
+
+    profiler = Profiler()
+    profiler.run(source, filename='fib.scm')
+    print(profiler.report())
+
+Procedures are identified by the lambda form that made them, and the
+report gives its file:line:col from the reader's `SourceMap`. While a
+profile runs, `Procedure.__call__` is swapped for a timing version, as
+`metrics.enable` does, and the JIT is off, since compiled procedures
+call themselves without going through `__call__`.
+"""
+
+import contextlib
+import time
+from typing import Any, Iterator
+from . import evaluator, jit
+from .environment import Env, StandartEnv
+from .parser import Position, SourceMap, read_program
+from .printer import lisp_str
+from .types import List
+
+
+class ProcedureStats:
+    "Calls of the procedures made by one lambda form, and the time they took."
+    __slots__ = ('form', 'position', 'calls', 'total', 'own', 'active')
+
+    def __init__(self, form, position: Position | None):
+        self.form = form
+        self.position = position
+        self.calls = 0
+        self.total = 0.0  # wall time, counting recursive calls once
+        self.own = 0.0    # wall time minus the procedures it called
+        self.active = 0
+
+
+class Profiler:
+    "Collect ProcedureStats while programs run."
+
+    def __init__(self):
+        self.stats: dict[int, ProcedureStats] = {}
+        self.lambdas: dict[int, tuple[list, SourceMap]] = {}
+
+    def run(self, source: str, env: Env | None = None,
+            filename: str = '<string>') -> Any:
+        "Evaluate source under the profiler; return its last value."
+        standart_env = StandartEnv()
+        if env is not None:
+            standart_env.update(env)
+        forms, source_map = read_program(source, filename)
+        self.add_source(forms, source_map)
+        result = None
+        with self.active():
+            for exp in forms:
+                try:
+                    result = evaluator.evaluate(exp, standart_env)
+                except Exception as exc:
+                    source_map.annotate(exc)
+                    raise
+        return result
+
+    def add_source(self, forms: list, source_map: SourceMap) -> None:
+        "Make the lambda forms in forms known, so they are reported by position."
+        stack = list(forms)
+        while stack:
+            x = stack.pop()
+            if isinstance(x, List) and x:
+                if x[0] == 'lambda' and len(x) == 3:
+                    # The parameter list (or symbol) is a distinct object
+                    # for every lambda form, and procedures keep it.
+                    self.lambdas[id(x[1])] = (x, source_map)
+                if x[0] != 'quote':
+                    stack.extend(x)
+
+    @contextlib.contextmanager
+    def active(self) -> Iterator['Profiler']:
+        "Profile every procedure call made inside the with block."
+        Procedure = evaluator.Procedure
+        call = Procedure.__call__
+        enabled = jit.enabled
+        stats = self.stats
+        children = []  # time spent in callees, one entry per active call
+
+        def profiled_call(proc, *args):
+            entry = stats.get(id(proc.parms))
+            if entry is None or entry.form[1] is not proc.parms:
+                entry = stats[id(proc.parms)] = self.new_stats(proc)
+            entry.calls += 1
+            entry.active += 1
+            children.append(0.0)
+            started = time.perf_counter()
+            try:
+                return call(proc, *args)
+            finally:
+                elapsed = time.perf_counter() - started
+                entry.own += elapsed - children.pop()
+                if children:
+                    children[-1] += elapsed
+                entry.active -= 1
+                if not entry.active:
+                    entry.total += elapsed
+
+        jit.enabled = False
+        Procedure.__call__ = profiled_call
+        try:
+            yield self
+        finally:
+            Procedure.__call__ = call
+            jit.enabled = enabled
+
+    def new_stats(self, proc) -> ProcedureStats:
+        form, source_map = self.lambdas.get(id(proc.parms), (None, None))
+        if form is None or form[1] is not proc.parms:
+            form, position = ['lambda', proc.parms, proc.body], None
+        else:
+            position = source_map.position(form)
+        return ProcedureStats(form, position)
+
+    def report(self, limit: int = 20) -> str:
+        "The procedures that took the most time of their own, one per line."
+        lines = [f'{"own ms":>10} {"total ms":>10} {"calls":>8}  where']
+        entries = sorted(self.stats.values(), key=lambda e: e.own, reverse=True)
+        for entry in entries[:limit]:
+            where = str(entry.position) if entry.position else '?'
+            text = lisp_str(entry.form)
+            if len(text) > 40:
+                text = text[:37] + '...'
+            lines.append(f'{entry.own * 1000:10.2f} {entry.total * 1000:10.2f} '
+                         f'{entry.calls:8}  {where}  {text}')
+        return '\n'.join(lines)
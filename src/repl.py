@@ -2,10 +2,12 @@ from distutils.log import error
 import traceback
 import sys
 from typing import Callable, NoReturn
-from .exceptions import EvaluatorException, QuitRequestException, UnexpectedCloseParen
+from .exceptions import (EvaluatorException, ParserException, QuitRequestException,
+                         UnexpectedCloseParen)
 from .environment import StandartEnv
 from .evaluator import evaluate, s_expr
-from .parser import parse
+from .parser import TOKEN_RE, read_program
+from .types import STRING_RE
 
 InputFn = Callable[[str], str]
 
@@ -30,6 +32,7 @@ def repl(prompt1: str = PROMPT1,
 
     global_env = StandartEnv()
     debug = True
+    line = 1  # of the next input, so that positions count from the start
 
     print(f'To Exit type {QUIT_COMMAND}', file=sys.stderr)
     print(
@@ -53,33 +56,46 @@ def repl(prompt1: str = PROMPT1,
             continue
         if not source:
             continue
-
-        # ___________________________________________ Eval
-        current_exp = parse(source)
-
-        if debug:
-            print('Tokens', current_exp)
-
         try:
-            result = evaluate(current_exp, global_env)
-        except EvaluatorException as exc:
+            forms, source_map = read_program(source, '<stdin>', line)
+        except ParserException as exc:
             print(error_mark, exc)
-            # traceback.print_exc()
-            continue
-        except LookupError as l:
-            print(error_mark, f' \'{l}\' not defined')
             continue
-        except Exception as ex:
-            # todo: validate this guy
-            if (debug):
-                traceback.print_exc()
-
-            print(error_mark, ex)
-            continue
-
-        # ___________________________________________ Print
-        if result is not None:
-            print(s_expr(result))
+        finally:
+            line += source.count('\n') + 1
+
+        for current_exp in forms:
+            if debug:
+                print('Tokens', current_exp)
+
+            # ___________________________________________ Eval
+            try:
+                result = evaluate(current_exp, global_env)
+            except Exception as exc:
+                source_map.annotate(exc)
+                report(exc, error_mark, debug)
+                break
+
+            # ___________________________________________ Print
+            if result is not None:
+                print(s_expr(result))
+
+
+def report(exc: Exception, error_mark: str, debug: bool) -> None:
+    "Print an evaluation error, with its Lisp traceback when debugging."
+    if isinstance(exc, EvaluatorException):
+        print(error_mark, exc)
+    elif type(exc) is LookupError:
+        print(error_mark, f' \'{exc}\' not defined')
+    else:
+        # todo: validate this guy
+        if (debug):
+            traceback.print_exc()  # notes included
+            debug = False
+        print(error_mark, exc)
+    if debug:
+        for note in getattr(exc, '__notes__', ()):
+            print(note)
 
 
 def multiline_input(prompt1: str,
@@ -88,21 +104,14 @@ def multiline_input(prompt1: str,
                     quit_cmd: str = QUIT_COMMAND,
                     input_fn: InputFn = input) -> str:
 
-    paren_cnt = 0
     lines = []
     prompt = prompt1
     while True:
         line = input_fn(prompt).rstrip()
         if line == quit_cmd:
             raise QuitRequestException()
-        for char in line:
-            if char == '(':
-                paren_cnt += 1
-            elif char == ')':
-                paren_cnt -= 1
-            if paren_cnt < 0:
-                raise_unexpected_paren(line)
         lines.append(line)
+        paren_cnt = count_parens('\n'.join(lines))
         prompt = prompt2
         if paren_cnt == 0:
             break
@@ -110,6 +119,27 @@ def multiline_input(prompt1: str,
     return '\n'.join(lines)
 
 
+def count_parens(source: str) -> int:
+    """Return how many parens are still open at the end of source.
+
+    Parens inside strings and character literals such as #\\( do not
+    count, and a string still open counts as one more paren, so that
+    multi-line strings keep the input going.
+    """
+    paren_cnt = 0
+    token = ''
+    for token in TOKEN_RE.findall(source):
+        if token == '(':
+            paren_cnt += 1
+        elif token == ')':
+            paren_cnt -= 1
+            if paren_cnt < 0:
+                raise_unexpected_paren(source.rsplit('\n', 1)[-1])
+    if token.startswith('"') and not STRING_RE.fullmatch(token):
+        paren_cnt += 1
+    return paren_cnt
+
+
 def raise_unexpected_paren(line: str) -> NoReturn:
     max_msg_len = 16
     if len(line) < max_msg_len:
@@ -0,0 +1,195 @@
+"""REPL server: attach to a running interpreter over TCP or a Unix socket.
+
+    $ python -m src.server --port 7777
+    $ nc localhost 7777
+
+Each connection gets its own session environment on top of a shared
+base environment, so definitions made by one client, and the modules
+it requires, are not seen by another. A session copies each binding of
+the base the first time it uses it, so a set! of a builtin stays in
+that session too; the base can still be changed for sessions that have
+not used the name yet. Evaluation runs in a worker pool, off the event loop.
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from . import metrics, modules
+from .environment import Env, StandartEnv
+from .evaluator import evaluate, s_expr
+from .exceptions import QuitRequestException, UnexpectedCloseParen
+from .parser import read_program
+from .repl import PROMPT1, PROMPT2, ERROR_MARK, QUIT_COMMAND, count_parens
+
+ENCODING = 'utf-8'
+
+
+class SessionEnv(Env):
+    "The globals of one session, copying the bindings of the base on first use."
+
+    def find(self, var):
+        "Find the innermost Env where var appears."
+        if var in self:
+            return self
+        try:
+            frame = self.outer.find(var)
+        except LookupError:
+            return self.find_import(var)
+        if frame is self.outer:
+            self[var] = frame[var]
+            return self
+        return frame
+
+
+class ReplServer:
+    "Serve one REPL session per connection, up to max_sessions at a time."
+
+    def __init__(self,
+                 base_env: Env | None = None,
+                 *,
+                 max_sessions: int = 16,
+                 workers: int | None = None,
+                 quit_cmd: str = QUIT_COMMAND):
+        self.base_env = base_env if base_env is not None else StandartEnv()
+        self.max_sessions = max_sessions
+        self.quit_cmd = quit_cmd
+        self.executor = ThreadPoolExecutor(workers or max_sessions)
+        self.sessions = 0
+
+    async def start_tcp(self, host: str = '127.0.0.1', port: int = 0) -> asyncio.Server:
+        "Listen on host:port; port 0 picks a free port."
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def start_unix(self, path: str) -> asyncio.Server:
+        return await asyncio.start_unix_server(self.handle, path)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def handle(self,
+                     reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        if self.sessions >= self.max_sessions:
+            await send(writer, f'{ERROR_MARK} too many sessions\n')
+            writer.close()
+            return
+        self.sessions += 1
+        env = SessionEnv(outer=self.base_env)
+        # Modules a session requires are visible in that session only.
+        env['require'] = lambda name: modules.require(name, env)
+        try:
+            await self.session(reader, writer, env)
+        except (ConnectionError, QuitRequestException):
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def session(self,
+                      reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter,
+                      env: Env) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # ___________________________________________ Read
+            try:
+                source = await self.read_source(reader, writer)
+            except UnexpectedCloseParen as exc:
+                await send(writer, f'{ERROR_MARK} {exc}\n')
+                continue
+            if source is None:
+                return
+            if not source:
+                continue
+
+            # ___________________________________________ Eval
+            try:
+                result = await loop.run_in_executor(
+                    self.executor, evaluate_source, source, env)
+            except Exception as exc:
+                if type(exc) is LookupError:  # not IndexError or KeyError
+                    await send(writer, f'{ERROR_MARK}  \'{exc}\' not defined\n')
+                else:
+                    await send(writer, f'{ERROR_MARK} {exc}\n')
+                continue
+
+            # ___________________________________________ Print
+            if result is not None:
+                await send(writer, s_expr(result) + '\n')
+
+    async def read_source(self,
+                          reader: asyncio.StreamReader,
+                          writer: asyncio.StreamWriter) -> str | None:
+        "Like multiline_input, but on a stream; None means the client left."
+        lines = []
+        prompt = PROMPT1
+        while True:
+            await send(writer, prompt)
+            data = await reader.readline()
+            if not data:
+                return None
+            line = data.decode(ENCODING, errors='replace').rstrip()
+            if line == self.quit_cmd:
+                raise QuitRequestException()
+            lines.append(line)
+            paren_cnt = count_parens('\n'.join(lines))
+            prompt = PROMPT2
+            if paren_cnt == 0:
+                return '\n'.join(lines)
+
+
+async def send(writer: asyncio.StreamWriter, text: str) -> None:
+    writer.write(text.encode(ENCODING))
+    await writer.drain()
+
+
+def evaluate_source(source: str, env: Env) -> Any:
+    "Evaluate every expression in source, returning the last value."
+    forms, source_map = read_program(source, '<session>')
+    result = None
+    for exp in forms:
+        metrics.record_form()
+        try:
+            result = evaluate(exp, env)
+        except Exception as exc:
+            metrics.record_exception(exc)
+            source_map.annotate(exc)
+            raise
+    return result
+
+
+async def serve(host: str = '127.0.0.1',
+                port: int = 7777,
+                *,
+                path: str | None = None,
+                max_sessions: int = 16) -> None:
+    server = ReplServer(max_sessions=max_sessions)
+    if path is not None:
+        listener = await server.start_unix(path)
+    else:
+        listener = await server.start_tcp(host, port)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serve lispy REPL sessions.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--unix', metavar='PATH',
+                        help='listen on a Unix domain socket instead of TCP')
+    parser.add_argument('--max-sessions', type=int, default=16)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, path=args.unix,
+                          max_sessions=args.max_sessions))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Lazy streams: memoized promises and stream pairs.
+
+A stream is either the empty list or a `Stream` pair whose cdr is a
+`Promise` of the rest. The lazy operations only force what they need,
+so pipelines over unbounded streams, including ones backed by Python
+iterators, never build an intermediate list. `stream-for-each` and
+`stream-fold` are also special forms in `evaluate`, so the head of the
+stream they walk is not kept alive by an argument list and memory stays
+constant however long the stream is.
+"""
+
+from typing import Any, Callable, Iterable
+
+EMPTY_STREAM: list = []
+
+
+class Promise:
+    "A delayed computation that runs at most once."
+    __slots__ = ('thunk', 'value')
+
+    def __init__(self, thunk: Callable[[], Any]):
+        self.thunk = thunk
+        self.value = None
+
+    def force(self) -> Any:
+        thunk = self.thunk
+        if thunk is not None:
+            value = thunk()
+            if self.thunk is not None:  # forcing may have forced us already
+                self.value = value
+                self.thunk = None  # let go of whatever the thunk captured
+        return self.value
+
+    def __repr__(self) -> str:
+        return '#<promise>'
+
+
+class Stream:
+    "A stream pair: a value and a promise of the rest of the stream."
+    __slots__ = ('car', 'cdr')
+
+    def __init__(self, car: Any, cdr: Promise):
+        self.car = car
+        self.cdr = cdr
+
+    def __repr__(self) -> str:
+        return '#<stream>'
+
+
+def force(x: Any) -> Any:
+    return x.force() if isinstance(x, Promise) else x
+
+
+def make_promise(x: Any) -> Promise:
+    "An already forced promise of x."
+    promise = Promise(None)
+    promise.value = x
+    return promise
+
+
+def is_null(s: Any) -> bool:
+    return isinstance(s, list) and not s
+
+
+def stream_car(s: Stream) -> Any:
+    return s.car
+
+
+def stream_cdr(s: Stream) -> Any:
+    return s.cdr.force()
+
+
+def stream_map(proc: Callable, *streams) -> Any:
+    if any(is_null(s) for s in streams):
+        return EMPTY_STREAM
+    return Stream(proc(*[s.car for s in streams]),
+                  Promise(lambda: stream_map(proc, *[stream_cdr(s) for s in streams])))
+
+
+def stream_filter(pred: Callable, s: Any) -> Any:
+    while not is_null(s):
+        if pred(s.car):
+            rest = s.cdr
+            return Stream(s.car, Promise(lambda: stream_filter(pred, rest.force())))
+        s = stream_cdr(s)
+    return EMPTY_STREAM
+
+
+def stream_take(s: Any, n: int) -> Any:
+    "The first n elements of s, as a lazy stream."
+    if n <= 0 or is_null(s):
+        return EMPTY_STREAM
+    rest = s.cdr
+    return Stream(s.car, Promise(lambda: stream_take(rest.force(), n - 1)))
+
+
+def stream_drop(s: Any, n: int) -> Any:
+    while n > 0 and not is_null(s):
+        s = stream_cdr(s)
+        n -= 1
+    return s
+
+
+def stream_for_each(proc: Callable, s: Any) -> None:
+    while not is_null(s):
+        proc(s.car)
+        s = stream_cdr(s)
+
+
+def stream_fold(proc: Callable, acc: Any, s: Any) -> Any:
+    "Combine the elements of s, left to right, as (proc acc element)."
+    while not is_null(s):
+        acc = proc(acc, s.car)
+        s = stream_cdr(s)
+    return acc
+
+
+def stream_to_list(s: Any, n: int | None = None) -> list:
+    "The elements of s, or its first n; no more of it is forced than that."
+    L = []
+    while not is_null(s) and (n is None or len(L) < n):
+        L.append(s.car)
+        if len(L) == n:
+            break
+        s = stream_cdr(s)
+    return L
+
+
+def iterator_to_stream(items: Iterable) -> Any:
+    "A stream pulling from a Python iterable, one element per force."
+    iterator = iter(items)
+    for first in iterator:
+        return Stream(first, Promise(lambda: iterator_to_stream(iterator)))
+    return EMPTY_STREAM
+
+
+def list_to_stream(L: list) -> Any:
+    return iterator_to_stream(L)
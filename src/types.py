@@ -1,20 +1,116 @@
-
+import re
+from .exceptions import UnexpectedEndOfSource, UnknownCharacterName
 
 # Types
 
-Symbol = str          # A Lisp Symbol is implemented as a Python str
+
+class Symbol(str):
+    "A Lisp Symbol is a Python str subclass, so strings can be told apart."
+
+
+def intern(name: str) -> Symbol:
+    "The one Symbol with this name, so that eq? holds between equal symbols."
+    symbol = _SYMBOLS.get(name)
+    if symbol is None:
+        symbol = _SYMBOLS.setdefault(name, Symbol(name))
+    return symbol
+
+
+_SYMBOLS: dict[str, Symbol] = {}
+
+
+class Char(str):
+    "A Lisp character is a one-letter str subclass."
+
+
+String = str          # A Lisp String is implemented as a Python str
 List = list         # A Lisp List is implemented as a Python list
 Number = (int, float)  # A Lisp Number is implemented as a Python int or float
 
 # Exp = Union[Symbol, Exp]
 
+CHAR_NAMES = {'space': ' ', 'newline': '\n', 'tab': '\t', 'nul': '\0'}
+STRING_RE = re.compile(r'"(?:\\.|[^\\"])*"', re.DOTALL)
+ESCAPES = {'n': '\n', 't': '\t', '0': '\0'}
+
 
 def atom(token):
-    "Numbers become numbers; every other token is a symbol."
+    'Numbers become numbers; "..." a string; #\\x a char; every other token is a symbol.'
+    if token[0] == '"':
+        if not STRING_RE.fullmatch(token):
+            raise UnexpectedEndOfSource(token)
+        return re.sub(r'\\(.)', lambda m: ESCAPES.get(m[1], m[1]),
+                      token[1:-1], flags=re.DOTALL)
+    elif token.startswith('#\\') and len(token) > 2:
+        name = token[2:]
+        if len(name) == 1:
+            return Char(name)
+        elif name not in CHAR_NAMES:
+            raise UnknownCharacterName(token)
+        return Char(CHAR_NAMES[name])
     try:
         return int(token)
     except ValueError:
         try:
             return float(token)
         except ValueError:
-            return Symbol(token)
+            return intern(token)
+
+
+class HashTable:
+    """A mutable Lisp hash table backed by a Python dict.
+
+    Keys are compared structurally: lists are used through `hash_key`,
+    so `(list 1 2)` finds what was stored under another `(list 1 2)`.
+    """
+    __slots__ = ('entries',)
+
+    def __init__(self, pairs=()):
+        self.entries = {}  # hash_key(key) -> (key, value)
+        for key, value in pairs:
+            self.set(key, value)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key) -> bool:
+        return hash_key(key) in self.entries
+
+    def get(self, key, default=None):
+        entry = self.entries.get(hash_key(key))
+        return default if entry is None else entry[1]
+
+    def set(self, key, value) -> None:
+        self.entries[hash_key(key)] = (key, value)
+
+    def remove(self, key) -> None:
+        self.entries.pop(hash_key(key), None)
+
+    def keys(self) -> list:
+        return [key for key, _ in self.entries.values()]
+
+    def values(self) -> list:
+        return [value for _, value in self.entries.values()]
+
+    def items(self):
+        return self.entries.values()
+
+
+class ListView:
+    "Base of the interop views (see interop.py) that Lisp reads as lists."
+    __slots__ = ()
+
+
+_LIST_KEY = object()
+
+
+def hash_key(x):
+    "A hashable stand-in for x; equal for structurally equal values."
+    if isinstance(x, (List, ListView)):  # a view finds what its list stored
+        return (_LIST_KEY, *map(hash_key, x))
+    elif isinstance(x, (Symbol, Char)):
+        return (type(x), str(x))
+    elif type(x) in (bool, int, float, complex):  # 1, #t and 1.0 are different keys
+        return (type(x), x)
+    else:
+        return x
@@ -0,0 +1,78 @@
+import pytest
+from src.cache import ResultCache, Uncacheable, dependencies, is_pure_builtin
+from src.environment import StandartEnv
+from src.file import run
+from src.parser import parse
+
+
+def test_pure_form_hits():
+    cache = ResultCache()
+    for _ in range(3):
+        assert run('(define sq (lambda (x) (* x x))) (sq 12)', cache=cache) == 144
+    assert cache.hits == 2
+
+
+def test_redefinition_invalidates():
+    cache = ResultCache()
+    env = StandartEnv()
+    cache.evaluate(parse('(define k 2)'), env)
+    assert cache.evaluate(parse('(* k 3)'), env) == 6
+    cache.evaluate(parse('(define k 5)'), env)
+    assert cache.evaluate(parse('(* k 3)'), env) == 15
+
+
+def test_rebinding_a_builtin_name_is_not_pure():
+    calls = []
+
+    def log_fn(x):
+        calls.append(x)
+        return x
+
+    cache = ResultCache()
+    for _ in range(3):
+        assert run('(abs 5)', {'abs': log_fn}, cache=cache) == 5
+    assert calls == [5, 5, 5]
+    assert cache.hits == 0
+
+
+def test_builtins_are_recognized_by_object():
+    env = StandartEnv()
+    assert is_pure_builtin(env['car']) and is_pure_builtin(StandartEnv()['car'])
+    assert is_pure_builtin(env['+'])
+    assert not is_pure_builtin(env['hash-set!'])
+    assert not is_pure_builtin(print)
+
+
+def test_side_effects_are_uncacheable():
+    env = StandartEnv()
+    with pytest.raises(Uncacheable):
+        dependencies(parse('(set! x 1)'), env)
+    with pytest.raises(Uncacheable):
+        dependencies(parse('(hash-set! (make-hash) 1 2)'), env)
+
+
+def test_malformed_lambda_is_left_to_evaluate():
+    with pytest.raises(Uncacheable):
+        dependencies(parse('(lambda 3 3)'), StandartEnv())
+
+
+def test_data_changed_in_place_invalidates():
+    cache = ResultCache()
+    env = StandartEnv()
+    env['xs'] = [1, 2]
+    assert cache.evaluate(parse('(car xs)'), env) == 1
+    env['xs'][0] = 9
+    assert cache.evaluate(parse('(car xs)'), env) == 9
+    assert cache.hits == 0
+
+
+def test_data_holding_procedures_is_uncacheable():
+    cache = ResultCache()
+    env = StandartEnv()
+    cache.evaluate(parse('(define h (make-hash))'), env)
+    cache.evaluate(parse('(define fs (list hash-set!))'), env)
+    for i in range(3):
+        cache.evaluate(parse('((car fs) h (hash-count h) 0)'), env)
+    assert len(env['h']) == 3
+    with pytest.raises(Uncacheable):
+        dependencies(parse('(car fs)'), env)
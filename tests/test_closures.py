@@ -0,0 +1,56 @@
+import pytest
+from src import closures
+from src.environment import Closure, StandartEnv
+from src.evaluator import evaluate
+from src.file import run
+from src.parser import parse, read_program
+
+NESTED = '''
+(define A (lambda (a)
+  (lambda (b)
+    (lambda (c)
+      (lambda (d) (+ a (+ b (+ c d))))))))
+(define B (A 1))
+(define C1 (B 2))
+'''
+
+
+def test_nested_lambdas_capture_only_free_variables():
+    env = StandartEnv()
+    for exp in map(parse, ['(define f (lambda (x y) (lambda (z) (+ x z))))',
+                           '(define g (f 1 2))']):
+        evaluate(exp, env)
+    g = env['g']
+    assert isinstance(g.env, Closure)
+    assert dict(g.env) == {'x': 1}
+    assert g(5) == 6
+
+
+def test_assigned_variables_stay_shared():
+    source = '''
+    (define make-counter (lambda (n)
+      (begin (define bump (lambda () (begin (set! n (+ n 1)) n)))
+             bump)))
+    (define c (make-counter 10))
+    (c) (c)'''
+    assert run(source) == 12
+
+
+def test_nested_closures_see_every_level():
+    assert run(NESTED + '((C1 3) 4)') == 10
+
+
+@pytest.mark.parametrize('max_plans', [1, 2, 3, 4, 10_000])
+def test_dropping_plans_keeps_captured_values_reachable(monkeypatch, max_plans):
+    monkeypatch.setattr(closures, 'MAX_PLANS', max_plans)
+    closures._plans.clear()
+    env = StandartEnv()
+    # Registering another lambda may drop the plans; B then makes a new
+    # C from a plan of its own, and C1, made before, makes D.
+    forms, _ = read_program(NESTED + '(define other (lambda (q) q)) '
+                            '(define E ((B 20) 30)) (define D (C1 3))')
+    for exp in forms:
+        evaluate(exp, env)
+    assert env['D'](4) == 10
+    assert env['E'](4) == 55
+    closures._plans.clear()
@@ -0,0 +1,58 @@
+from benchmarks import differential
+from benchmarks.differential import (Corpus, Engine, Outcome, Program, compare, engines,
+                                     load_tests, normalize, random_corpus, run_corpus)
+from src.types import Symbol
+
+
+class OffByOne(Engine):
+    "An engine that gets every integer result wrong."
+
+    def evaluate(self, source, env):
+        value = super().evaluate(source, env)
+        return value + 1 if type(value) is int else value
+
+
+def test_normalize_tells_types_apart():
+    assert normalize(1) != normalize(1.0) != normalize(True)
+    assert normalize(Symbol('a')) == ('symbol', 'a') != normalize('a')
+    assert normalize((1, [2])) == normalize([1, [2]])
+    assert normalize(len) == ('procedure',)
+
+
+def test_random_programs_are_reproducible():
+    first, second = random_corpus(20, seed=3), random_corpus(20, seed=3)
+    assert first.programs == second.programs
+    assert first.programs != random_corpus(20, seed=4).programs
+
+
+def test_outcomes_record_values_and_errors():
+    corpus = Corpus('c', 'lis', [Program('ok', ['(define x 2)', '(* x 3)']),
+                                 Program('bad', ['(car 1)'])], shared_env=False)
+    [(ok, _), (bad, _)] = run_corpus(Engine('src'), corpus)
+    assert ok == Outcome(normalize(6))
+    assert bad == Outcome(error='TypeError')
+
+
+def test_engines_agree_on_the_corpus():
+    corpora = load_tests() + [random_corpus(60, seed=1)]
+    all_engines = engines()
+    assert any(engine.unavailable for engine in all_engines)  # original/lispy.py
+    mismatches, records = compare(corpora, all_engines, out=lambda text: None)
+    assert mismatches == 0
+    assert len(records) == sum(len(corpus.programs) for corpus in corpora)
+
+
+def test_disagreements_are_reported():
+    lines = []
+    corpus = Corpus('c', 'lis', [Program('sum', ['(+ 1 2)']), Program('sym', ["'a"])],
+                    shared_env=False)
+    mismatches, _ = compare([corpus], [Engine('src'), OffByOne('broken')], out=lines.append)
+    assert mismatches == 1
+    assert any(line.startswith('  MISMATCH sum broken') for line in lines)
+
+
+def test_main_exit_status(tmp_path, monkeypatch):
+    monkeypatch.setattr(differential, 'load_tests', lambda: [])
+    path = tmp_path / 'out.json'
+    assert differential.main(['--random', '5', '--json', str(path)]) == 0
+    assert path.exists()
@@ -0,0 +1,50 @@
+import pytest
+from src.exceptions import InvalidSyntax, UnexpectedEndOfSource
+from src.file import eval_batch, run
+
+
+def test_run_returns_last_value():
+    assert run('(define x 2) (* x 21)') == 42
+
+
+def test_eval_batch_keeps_order_and_isolates_defines():
+    results = eval_batch(['(define x 1)', '(+ 1 2)', 'x'], {'y': 5})
+    assert results[1].value == 3
+    assert isinstance(results[2].error, LookupError)
+
+
+def test_eval_batch_reports_errors_per_item():
+    results = eval_batch(['(car (quote ()))', '(+ 2 2)'])
+    assert isinstance(results[0].error, IndexError)
+    assert results[1].value == 4
+
+
+def test_eval_batch_rejects_several_forms():
+    [result] = eval_batch(['(+ 1 2) (+ 3 4)'])
+    assert isinstance(result.error, InvalidSyntax)
+    assert str(result.error.position) == '<string>:1:9'
+
+
+@pytest.mark.parametrize('source', ['(', ''])
+def test_eval_batch_reports_unterminated_source(source):
+    [result] = eval_batch([source])
+    assert isinstance(result.error, UnexpectedEndOfSource)
+    assert result.error.position is not None
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_eval_batch_workers(executor):
+    sources = [f'(* {i} {i})' for i in range(20)]
+    results = eval_batch(sources, workers=2, executor=executor)
+    assert [r.value for r in results] == [i * i for i in range(20)]
+
+
+def test_unpicklable_results_fail_only_their_item():
+    results = eval_batch(['car', '(lambda (x) x)', '(+ 1 2)'], workers=2, executor='process')
+    assert results[0].error is not None and results[1].error is not None
+    assert results[2].value == 3
+
+
+def test_unknown_executor_is_rejected():
+    with pytest.raises(ValueError):
+        eval_batch(['1'], executor='fork')
@@ -0,0 +1,60 @@
+from src.incremental import IncrementalRunner, split_forms
+
+
+def test_split_forms_hashes_tokens_not_whitespace():
+    [(a, _, _)] = split_forms('(define x  1)')
+    [(b, _, _)] = split_forms('(define\nx 1)')
+    assert a == b
+    assert len(split_forms('(define x 1) x (+ x 1)')) == 3
+
+
+def test_only_changed_forms_and_their_readers_run():
+    runner = IncrementalRunner()
+    assert runner.run('(define x 1) (define y 2) (+ x 1) (+ y 1)') == [None, None, 2, 3]
+    assert runner.evaluated == 4
+    assert runner.run('(define x 10) (define y 2) (+ x 1) (+ y 1)') == [None, None, 11, 3]
+    assert runner.evaluated == 2
+
+
+def test_deleted_definition_is_removed():
+    runner = IncrementalRunner()
+    runner.run('(define x 1) (define car 2)')
+    runner.run('')
+    assert 'x' not in runner.env
+    assert callable(runner.env['car'])
+
+
+def test_mutating_builtins_mark_their_argument_changed():
+    runner = IncrementalRunner()
+    source = '(define h (make-hash)) (hash-set! h 1 2) (hash-count h)'
+    assert runner.run(source)[-1] == 1
+    assert runner.run(source.replace('(hash-count', '(hash-set! h 3 4) (hash-count'))[-1] == 2
+    assert runner.run(source)[-1] == 1  # the added hash-set! is undone
+
+
+def test_vector_set_reruns_readers():
+    runner = IncrementalRunner()
+    source = '(define v (vector 1 2 3)) (vector-ref v 0)'
+    assert runner.run(source)[-1] == 1
+    edited = source.replace('(vector-ref', '(vector-set! v 0 9) (vector-ref')
+    assert runner.run(edited)[-1] == 9
+    assert runner.run(source)[-1] == 1
+
+
+def test_mutation_through_a_procedure():
+    runner = IncrementalRunner()
+    source = '''
+    (define h (make-hash))
+    (define add! (lambda (k) (hash-set! h k 1)))
+    (add! 1)
+    (hash-count h)'''
+    assert runner.run(source)[-1] == 1
+    assert runner.run(source.replace('(add! 1)', '(add! 1) (add! 2)'))[-1] == 2
+    assert runner.run(source)[-1] == 1
+
+
+def test_deleting_one_of_two_definitions_reruns_the_other():
+    runner = IncrementalRunner()
+    assert runner.run('(define x 1) (define x 2) (+ x 0)') == [None, None, 2]
+    assert runner.run('(define x 1) (+ x 0)') == [None, 1]
+    assert runner.env['x'] == 1
@@ -0,0 +1,91 @@
+from array import array
+import pytest
+from src.file import run
+from src.interop import SequenceView, Vector, make_vector, to_lisp, to_python
+from src.types import HashTable
+
+SUM = '''
+(define sum (lambda (xs) (if (null? xs) 0 (+ (car xs) (sum (cdr xs))))))
+(sum data)'''
+
+
+def test_buffers_and_sequences_are_viewed_not_copied():
+    data = array('d', [1.0, 2.0, 3.0])
+    vector = to_lisp(data)
+    assert isinstance(vector, Vector) and to_python(vector).obj is data
+    view = to_lisp((1, (2, 3)))
+    assert isinstance(view, SequenceView) and isinstance(view[1], SequenceView)
+    assert to_python(view[1:]) == [(2, 3)]
+    items = [1, 2]
+    assert to_lisp(items) is items
+    assert isinstance(to_lisp({'a': 1}), HashTable)
+
+
+def test_cdr_slices_views():
+    result = run('(cdr data)', {'data': bytes(range(5))})
+    assert isinstance(result, Vector)
+    assert to_python(result).tobytes() == bytes(range(1, 5))
+
+
+@pytest.mark.parametrize('data', [(1, 2, 3), b'\x01\x02\x03', array('q', [1, 2, 3]), [1, 2, 3]])
+def test_recursive_list_code_accepts_views(data):
+    assert run(SUM, {'data': data}) == 6
+    assert run('(list? data)', {'data': data}) is True
+
+
+def test_cons_and_append_copy_views_into_lists():
+    assert run('(cons 0 data)', {'data': (1, 2)}) == [0, 1, 2]
+    assert run('(append data (list 3))', {'data': b'\x01\x02'}) == [1, 2, 3]
+    assert run('(append (list 0) data)', {'data': (1,)}) == [0, 1]
+
+
+def test_views_equal_lists_of_their_items():
+    assert run('(equal? data (list 1 (list 2 3)))', {'data': (1, (2, 3))}) is True
+    assert run('(equal? data (list 1 2))', {'data': b'\x01\x02'}) is True
+    assert run('(equal? data (list 1 2))', {'data': (1, 3)}) is False
+    assert make_vector([1, 2]) == SequenceView((1, 2))
+
+
+def test_views_are_hash_keys():
+    source = '''
+    (define h (make-hash))
+    (hash-set! h data 1)
+    (list (hash-ref h (list 1 2)) (hash-has-key? h (cdr data)))'''
+    assert run(source, {'data': (1, 2)}) == [1, False]
+    assert run('(begin (define h (make-hash)) (hash-set! h (list 1 2) 3) (hash-ref h data))',
+               {'data': b'\x01\x02'}) == 3
+    with pytest.raises(TypeError):
+        hash(to_lisp(b'ab'))
+
+
+def test_vectors_made_by_lisp_code_can_be_set_to_anything():
+    source = '''
+    (define v (vector 1 2 3))
+    (vector-set! v 0 1.5)
+    (vector-set! v 1 (quote a))
+    (vector-set! (cdr (cdr v)) 0 (list 4))
+    v'''
+    assert run(source).tolist() == [1.5, 'a', [4]]
+    assert run('(begin (define v (list->vector (list 1 (quote b)))) (vector-set! v 1 2) v)') \
+        == [1, 2]
+    assert run('(begin (define xs (list 1)) (define v (vector xs)) (eq? (vector-ref v 0) xs))')
+
+
+def test_vector_set_needs_a_vector():
+    with pytest.raises(TypeError):
+        run('(vector-set! (list 1 2) 0 9)')
+    with pytest.raises(TypeError):
+        run('(vector-set! data 0 9)', {'data': (1, 2)})
+    data = bytearray(2)
+    run('(vector-set! data 0 9)', {'data': data})
+    assert data == bytearray([9, 0])
+
+
+def test_sequences_nested_in_lists_are_wrapped():
+    data = [(1,), b'\x02', [(3, 4)]]
+    assert run('(null? (cdr (car data)))', {'data': data}) is True
+    assert run('(list? (car data))', {'data': data}) is True
+    assert run('(car (cadr data))', {'data': data, 'cadr': lambda x: x[1]}) == 2
+    assert run('(car (car (car (cdr (cdr data)))))', {'data': data}) == 3
+    assert to_python(run('data', {'data': data})) is data
+    assert repr(to_lisp([(1, 2), 'a'])) == '(#(1 2) "a")'
@@ -0,0 +1,103 @@
+import pytest
+from src import jit
+from src.environment import StandartEnv
+from src.evaluator import evaluate
+from src.parser import read_program
+
+FIB = '(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))'
+
+
+@pytest.fixture(autouse=True)
+def eager_jit(monkeypatch):
+    monkeypatch.setattr(jit, 'enabled', True)
+    monkeypatch.setattr(jit, 'threshold', 3)
+    monkeypatch.setattr(jit, 'dump_to_stderr', False)
+
+
+def run(source, env=None):
+    env = StandartEnv() if env is None else env
+    forms, _ = read_program(source)
+    for exp in forms:
+        result = evaluate(exp, env)
+    return result, env
+
+
+def test_hot_procedure_is_compiled():
+    result, env = run(FIB + '(fib 15)')
+    assert result == 610
+    fib = env['fib']
+    assert fib.compiled is not None
+    source = jit.dump(fib)
+    assert source.startswith('def jitted(p0):')
+    assert 'jitted if' in source  # calls itself directly
+
+
+def test_cold_and_uncompilable_procedures_are_interpreted():
+    _, env = run('(define f (lambda (x) x)) (f 1)'
+                 '(define g (lambda (x) (begin (define y x) y))) (g 1) (g 2) (g 3)')
+    assert env['f'].compiled is None
+    assert env['g'].compiled is None
+    assert jit.dump(env['f']) is None
+
+
+def test_redefinition_is_seen_by_compiled_code():
+    result, env = run(FIB + '(fib 10) (define + -) (fib 5)')
+    assert env['fib'].compiled is not None
+    assert result == -1  # what the interpreter gives with + as -
+
+
+def test_set_by_a_callee_is_seen_in_the_same_call():
+    source = '''
+    (define x 0)
+    (define g (lambda () (set! x (+ x 1))))
+    (define f (lambda () (begin (g) x)))
+    (define loop (lambda (n acc) (if (= n 0) acc (loop (- n 1) (+ acc (f))))))
+    (loop 150 0)'''
+    result, env = run(source)
+    assert env['f'].compiled is not None
+    assert result == 11325
+
+
+def test_guard_failure_deoptimizes():
+    _, env = run('(define k 1) (define f (lambda (x) (+ x k))) (f 1) (f 1) (f 1)')
+    f = env['f']
+    assert f.compiled is not None
+    del env['k']
+    with pytest.raises(LookupError):
+        f(1)
+    assert f.compiled is None and f.calls == 0
+    env['k'] = 10
+    assert f(1) == 11
+
+
+def test_shadowing_between_frames_is_respected():
+    source = '''
+    (define k 1)
+    (define make (lambda () (begin
+      (define f (lambda (x) (+ x k)))
+      (define run (lambda () (begin (f 0) (f 0) (f 0) (define k 100) (f 0))))
+      (run))))
+    (make)'''
+    result, _ = run(source)
+    assert result == 1  # define inside run binds k in run's frame, not make's
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(jit, 'enabled', False)
+    _, env = run(FIB + '(fib 10)')
+    assert env['fib'].compiled is None
+
+
+def test_errors_in_compiled_code_keep_their_lisp_frames():
+    source = '''(define first (lambda (x) (car x)))
+(define loop (lambda (n) (if (= n 0) (first 1) (begin (first (list n)) (loop (- n 1))))))'''
+    env = StandartEnv()
+    forms, source_map = read_program(source + '\n(loop 10)', 't.scm')
+    for exp in forms[:2]:
+        evaluate(exp, env)
+    with pytest.raises(TypeError) as info:
+        evaluate(forms[2], env)
+    assert env['first'].compiled is not None and env['loop'].compiled is not None
+    source_map.annotate(info.value)
+    [note] = info.value.__notes__
+    assert note.endswith('t.scm:1:27: (car x)')
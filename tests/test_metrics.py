@@ -0,0 +1,81 @@
+import pytest
+from src import metrics
+from src.environment import StandartEnv
+from src.evaluator import evaluate
+from src.file import eval_batch, run
+from src.incremental import IncrementalRunner
+from src.server import evaluate_source
+
+
+@pytest.fixture
+def registry():
+    registry = metrics.enable()
+    yield registry
+    metrics.disable()
+
+
+def test_run_counts_forms_calls_and_frames(registry):
+    assert run('(define f (lambda (x) (* x 2))) (f 3)') == 6
+    snapshot = registry.snapshot()
+    assert snapshot['forms_evaluated'] == 2
+    assert snapshot['procedure_calls'] == 1
+    assert snapshot['frames_allocated'] >= 1
+    assert snapshot['parses'] == 1 and snapshot['parse_seconds'] > 0
+    assert snapshot['find_depth']
+
+
+def test_hot_recursive_procedures_are_counted(registry):
+    run('(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2)))))) (fib 15)')
+    assert registry.procedure_calls == 1973
+    assert registry.frames_allocated == 1973
+
+
+def test_top_level_calls_are_counted(registry):
+    run('(+ 1 2)')
+    assert registry.evaluations == 4  # the form, +, 1 and 2
+
+
+def test_disable_restores_the_interpreter(registry):
+    original = metrics._originals['evaluate']
+    metrics.disable()
+    from src import evaluator
+    assert evaluator.evaluate is original
+    from src import file, jit
+    assert file.evaluate is original and jit.enabled
+    assert metrics.active is None
+    run('(+ 1 2)')
+    assert registry.forms_evaluated == 0
+
+
+def test_reader_errors_are_counted(registry):
+    with pytest.raises(Exception):
+        run('(+ 1')
+    assert registry.exceptions == {'UnexpectedEndOfSource': 1}
+    assert registry.parses == 0
+
+
+def test_eval_batch_is_counted(registry):
+    results = eval_batch(['(+ 1 2)', '(car 1)', '1 2'])
+    assert [r.error is None for r in results] == [True, False, False]
+    assert registry.forms_evaluated == 2
+    assert registry.parses == 3
+    assert registry.exceptions == {'TypeError': 1, 'InvalidSyntax': 1}
+
+
+def test_server_and_incremental_runs_are_counted(registry):
+    assert evaluate_source('(define x 1) (+ x 1)', StandartEnv()) == 2
+    runner = IncrementalRunner()
+    runner.run('(define y 1) (+ y 1)')
+    with pytest.raises(LookupError):
+        runner.run('(define y 1) (+ z 1)')
+    assert registry.forms_evaluated == 5
+    assert registry.exceptions == {'LookupError': 1}
+    assert registry.parses == 1 + 2 + 1  # incremental runs read only new forms
+
+
+def test_prometheus_exposition(registry):
+    run('(+ 1 2)')
+    text = registry.prometheus()
+    assert 'lispy_forms_evaluated_total 1' in text
+    assert 'lispy_parse_seconds_count 1' in text
+    assert '# TYPE lispy_env_find_depth histogram' in text
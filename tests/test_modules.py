@@ -0,0 +1,124 @@
+import json
+import pytest
+from src import modules
+from src.environment import StandartEnv
+from src.evaluator import evaluate
+from src.exceptions import ModuleNotFound
+from src.parser import read_program
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    "Write modules into a fresh directory on the search path."
+    monkeypatch.setattr(modules, 'search_path', [str(tmp_path)])
+    monkeypatch.setattr(modules, 'write_artifacts', False)
+    modules.clear()
+
+    def write(name, source):
+        (tmp_path / (name + '.scm')).write_text(source)
+    yield write
+    modules.clear()
+
+
+def run(source, env=None):
+    env = StandartEnv() if env is None else env
+    forms, _ = read_program(source)
+    for exp in forms:
+        result = evaluate(exp, env)
+    return result
+
+
+COUNTER = '''
+(define count 0)
+(define bump (lambda () (set! count (+ count 1))))
+'''
+
+
+def test_require_makes_definitions_visible(library):
+    library('counter', COUNTER)
+    assert run('(require "counter") (bump) (bump) count') == 2
+
+
+def test_imported_bindings_are_live(library):
+    library('counter', COUNTER)
+    env = StandartEnv()
+    assert run('(require "counter") (define a count) (bump) (bump) (list a count)',
+               env) == [0, 2]
+
+
+def test_modules_load_once(library):
+    library('counter', COUNTER)
+    run('(require "counter") (bump)')
+    assert run('(require "counter") count') == 1
+
+
+def test_definitions_run_lazily(library):
+    library('lazy', '(define used (quote yes)) (define broken (lambda () (car 1)))'
+                    '(define unused (quote no))')
+    run('(require "lazy") used')
+    module = modules.load('lazy')
+    assert set(module.pending) == {'broken', 'unused'}
+
+
+def test_repeated_and_dependent_definitions_run_in_order(library):
+    library('order', '(define a 1) (define b a) (define a 2) (define c b)')
+    assert run('(require "order") (list a b c)') == [2, 1, 1]
+
+
+def test_missing_module(library):
+    with pytest.raises(ModuleNotFound):
+        run('(require "nowhere")')
+
+
+def test_artifact_is_json_and_keeps_positions(library, tmp_path, monkeypatch):
+    monkeypatch.setattr(modules, 'write_artifacts', True)
+    library('chars', '(define s "a b")\n(define c #\\a)\n(define f (lambda (x) (car x)))')
+    first, _ = modules.read_module(modules.find_module('chars'))
+    saved = json.loads((tmp_path / '__lispycache__' / 'chars.scm.json').read_text())
+    assert saved['forms'][0][0] == 0
+    forms, source_map = modules.read_module(modules.find_module('chars'))
+    assert forms == first
+    assert [type(form[2]).__name__ for form in forms] == ['str', 'Char', 'list']
+    assert str(source_map.position(forms[2][2])) == f'{tmp_path}/chars.scm:3:11'
+
+
+def test_stale_or_damaged_artifacts_are_ignored(library, tmp_path, monkeypatch):
+    monkeypatch.setattr(modules, 'write_artifacts', True)
+    library('m', '(define x 1)')
+    modules.read_module(modules.find_module('m'))
+    (tmp_path / '__lispycache__' / 'm.scm.json').write_text('{"digest": 1, "forms": "x"}')
+    library('m', '(define x 2)')
+    forms, _ = modules.read_module(modules.find_module('m'))
+    assert forms == [['define', 'x', 2]]
+
+
+def test_jit_reads_imported_names_live(library, monkeypatch):
+    from src import jit
+    monkeypatch.setattr(jit, 'threshold', 2)
+    library('counter', COUNTER)
+    env = StandartEnv()
+    run('(require "counter") (define get (lambda () count))', env)
+    values = [run('(begin (bump) (get))', env) for _ in range(5)]
+    assert env['get'].compiled is not None
+    assert values == [1, 2, 3, 4, 5]
+
+
+def test_a_failing_definition_fails_every_time(library):
+    library('broken', '(define bad (lambda))')
+    env = StandartEnv()
+    run('(require "broken")', env)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            run('bad', env)
+
+
+def test_concurrent_lookups_run_a_definition_once(library):
+    from concurrent.futures import ThreadPoolExecutor
+    names = [f'f{i}' for i in range(200)]
+    library('many', ' '.join(f'(define {name} (lambda () {i}))' for i, name in enumerate(names)))
+    module = modules.load('many')
+    with ThreadPoolExecutor(8) as pool:
+        frames = list(pool.map(module.find, names * 4))
+    assert all(frame is module for frame in frames)
+    assert not module.pending
+    assert module['f7']() == 7
@@ -0,0 +1,52 @@
+import pytest
+from src.evaluator import evaluate
+from src.environment import StandartEnv
+from src.exceptions import UnexpectedCloseParen, UnexpectedEndOfSource
+from src.file import run
+from src.parser import parse, read_program
+
+
+def test_read_program_returns_plain_lists():
+    forms, _ = read_program('(define x 1) (+ x (* 2 3))')
+    assert forms == [parse('(define x 1)'), parse('(+ x (* 2 3))')]
+    assert all(type(form) is list for form in forms)
+
+
+def test_positions_are_recorded_by_identity():
+    forms, source_map = read_program('(a\n  (b c))', 'f.scm')
+    assert str(source_map.position(forms[0])) == 'f.scm:1:1'
+    assert str(source_map.position(forms[0][1])) == 'f.scm:2:3'
+    assert source_map.position(['b', 'c']) is None
+
+
+def test_position_offsets_for_pieces_of_a_file():
+    forms, source_map = read_program('(x)', 'f.scm', line=10, col=5)
+    assert str(source_map.position(forms[0])) == 'f.scm:10:5'
+
+
+@pytest.mark.parametrize('source, error, where', [
+    ('(+ 1\n  (* 2 3)', UnexpectedEndOfSource, 'f.scm:1:1'),
+    ('(+ 1 2))', UnexpectedCloseParen, 'f.scm:1:8'),
+    ('(display "abc)', UnexpectedEndOfSource, 'f.scm:1:10'),
+])
+def test_reader_errors_have_positions(source, error, where):
+    with pytest.raises(error) as info:
+        read_program(source, 'f.scm')
+    assert str(info.value.position) == where
+    assert str(info.value).startswith(where)
+    assert info.value.args  # so callers can use args[0]
+
+
+def test_errors_get_a_lisp_traceback():
+    source = '(define f (lambda (x) (car x)))\n(+ 1\n   (f (quote ())))'
+    with pytest.raises(IndexError) as info:
+        run(source, filename='t.scm')
+    [note] = info.value.__notes__
+    assert 't.scm:2:1: (+ 1 (f (quote ())))' in note
+    assert 't.scm:3:4: (f (quote ()))' in note
+    assert 't.scm:1:23: (car x)' in note
+
+
+def test_evaluation_is_unchanged():
+    [exp], _ = read_program('(* 6 7)')
+    assert evaluate(exp, StandartEnv()) == 42
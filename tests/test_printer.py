@@ -0,0 +1,58 @@
+import io
+from array import array
+from src import printer
+from src.file import run
+from src.interop import to_lisp
+from src.parser import parse
+from src.printer import lisp_str, write
+from src.types import Char, HashTable, Symbol
+
+
+def test_atoms():
+    assert lisp_str([True, False, Symbol('x'), Char(' '), Char('a'), 'a "b"\n', 1j, 2.5]) \
+        == '(#t #f x #\\space #\\a "a \\"b\\"\\n" 1i 2.5)'
+
+
+def test_printed_forms_read_back():
+    source = '(define f (lambda (x) (if (< x 1) (quote (a "s" #\\b)) (f (- x 1)))))'
+    assert lisp_str(parse(source)) == source
+
+
+def test_deep_nesting_does_not_recurse():
+    x = []
+    for _ in range(100_000):
+        x = [x]
+    text = lisp_str(x)
+    assert text.startswith('((((') and len(text) == 200_002
+
+
+def test_cycles_and_sharing_are_labelled():
+    x = [1, 2]
+    x.append(x)
+    assert lisp_str(x) == '#0=(1 2 #0#)'
+    shared = [3]
+    assert lisp_str([shared, shared]) == '((3) (3))'
+    assert lisp_str([shared, shared], shared=True) == '(#0=(3) #0#)'
+
+
+def test_output_is_written_in_chunks():
+    chunks = []
+
+    class Sink:
+        def write(self, text):
+            chunks.append(text)
+
+    numbers = list(range(3 * printer.CHUNK))
+    write([numbers, ['a'] * printer.CHUNK], Sink())
+    assert len(chunks) > 2
+    assert ''.join(chunks) == lisp_str([numbers, ['a'] * printer.CHUNK])
+
+
+def test_hash_tables_and_vectors():
+    assert lisp_str(HashTable([(1, 'a')])) == '#hash((1 "a"))'
+    assert lisp_str(to_lisp(b'\x01\x02')) == '#u8(1 2)'
+    assert lisp_str(to_lisp(array('d', [1.5]))) == '#(1.5)'
+    assert lisp_str(to_lisp((1, ('a',)))) == '#(1 #("a"))'
+    buffer = io.StringIO()
+    write(run('(list 1 (vector 2 3))'), buffer)
+    assert buffer.getvalue() == '(1 #(2 3))'
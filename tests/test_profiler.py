@@ -0,0 +1,27 @@
+from src import evaluator, jit
+from src.profiler import Profiler
+
+SOURCE = '''\
+(define fib (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2))))))
+(define go
+  (lambda (n) (fib n)))
+(go 10)
+'''
+
+
+def test_profile_counts_calls_by_source_position():
+    profiler = Profiler()
+    assert profiler.run(SOURCE, filename='fib.scm') == 55
+    stats = {str(entry.position): entry for entry in profiler.stats.values()}
+    assert stats['fib.scm:1:13'].calls == 177
+    assert stats['fib.scm:3:3'].calls == 1
+    assert stats['fib.scm:3:3'].total >= stats['fib.scm:1:13'].total
+    report = profiler.report()
+    assert 'fib.scm:1:13' in report and 'fib.scm:3:3' in report
+
+
+def test_profiler_restores_the_interpreter():
+    call, enabled = evaluator.Procedure.__call__, jit.enabled
+    Profiler().run('((lambda (x) x) 1)')
+    assert evaluator.Procedure.__call__ is call
+    assert jit.enabled == enabled
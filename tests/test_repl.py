@@ -0,0 +1,53 @@
+import pytest
+from src.exceptions import UnexpectedCloseParen
+from src.repl import count_parens, repl
+
+
+def run_repl(lines, capsys):
+    inputs = iter(lines)
+
+    def input_fn(prompt):
+        try:
+            return next(inputs)
+        except StopIteration:
+            raise EOFError
+    repl(input_fn=input_fn)
+    captured = capsys.readouterr()
+    return captured.out, captured.err
+
+
+def test_repl_prints_results(capsys):
+    out, _ = run_repl(['.d', '(define x 2)', '(* x', '  21)'], capsys)
+    assert out.splitlines()[-1] == '42'
+
+
+def test_repl_errors_have_positions(capsys):
+    out, err = run_repl(['(define x 2)', '(+ x', '   (car (quote ())))'], capsys)
+    out += err  # the traceback, in debug mode
+    assert '<stdin>:2:1: (+ x (car (quote ())))' in out
+    assert '<stdin>:3:4: (car (quote ()))' in out
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('(+ 1 2)', 0),
+    ('(define f (lambda (x)', 2),
+    ('(char->integer #\\()', 0),
+    ('(list #\\) #\\a)', 0),
+    ('(display "(((")', 0),
+    ('(display "a\n  (b', 2),
+    ('(display "a\n  (b"\n  1)', 0),
+    ('"abc\\"', 1),
+])
+def test_count_parens(source, expected):
+    assert count_parens(source) == expected
+
+
+def test_count_parens_rejects_extra_close():
+    with pytest.raises(UnexpectedCloseParen):
+        count_parens('(+ 1 2))')
+
+
+def test_multiline_string_input(capsys):
+    out, _ = run_repl(['.d', '(string-length "a', 'b)")', '(char->integer #\\()'],
+                      capsys)
+    assert out.splitlines()[-2:] == ['4', '40']
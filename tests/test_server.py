@@ -0,0 +1,150 @@
+import asyncio
+import time
+from src import modules
+from src.environment import StandartEnv
+from src.repl import PROMPT1
+from src.server import ReplServer, ENCODING
+
+
+def serve(test, **options):
+    "Run test(connect) against a ReplServer listening on a free localhost port."
+    async def main():
+        base = StandartEnv()
+        base['sleep'] = time.sleep
+        server = ReplServer(base, **options)
+        listener = await server.start_tcp('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+
+        async def connect():
+            return Client(*await asyncio.open_connection('127.0.0.1', port))
+        try:
+            async with listener:
+                await asyncio.wait_for(test(connect), 10)
+        finally:
+            server.close()
+    asyncio.run(main())
+
+
+class Client:
+
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+
+    async def prompt(self):
+        return await self.reader.readuntil(PROMPT1.encode(ENCODING))
+
+    async def eval(self, source):
+        "Send source and return what the server answers before the next prompt."
+        self.writer.write(source.encode(ENCODING) + b'\n')
+        await self.writer.drain()
+        data = await self.prompt()
+        return data.decode(ENCODING)[:-len(PROMPT1)].strip()
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def test_sessions_are_isolated():
+    async def test(connect):
+        a, b = await connect(), await connect()
+        await a.prompt()
+        await b.prompt()
+        assert await a.eval('(define x 1)') == ''
+        assert await a.eval('(+ x 41)') == '42'
+        assert 'not defined' in await b.eval('x')
+        await a.close()
+        await b.close()
+    serve(test)
+
+
+def test_set_of_a_builtin_stays_in_its_session():
+    async def test(connect):
+        a, b = await connect(), await connect()
+        await a.prompt()
+        await b.prompt()
+        assert await a.eval('(set! + -)') == ''
+        assert await a.eval('(+ 5 3)') == '2'
+        assert await b.eval('(+ 5 3)') == '8'
+        await a.close()
+        await b.close()
+    serve(test)
+
+
+def test_index_errors_are_not_reported_as_unbound():
+    async def test(connect):
+        client = await connect()
+        await client.prompt()
+        answer = await client.eval('(car (quote ()))')
+        assert 'not defined' not in answer and 'out of range' in answer
+        await client.close()
+    serve(test)
+
+
+def test_required_modules_are_per_session(tmp_path, monkeypatch):
+    (tmp_path / 'greet.scm').write_text('(define hello (quote hi))')
+    monkeypatch.setattr(modules, 'search_path', [str(tmp_path)])
+    modules.clear()
+
+    async def test(connect):
+        a, b = await connect(), await connect()
+        await a.prompt()
+        await b.prompt()
+        assert await a.eval('(require "greet")') == ''
+        assert await a.eval('hello') == 'hi'
+        assert 'not defined' in await b.eval('hello')
+        await a.close()
+        await b.close()
+    serve(test)
+
+
+def test_multiline_input_is_balanced():
+    async def test(connect):
+        client = await connect()
+        await client.prompt()
+        client.writer.write(b'(+ 1\n')
+        assert (await client.eval('  2)')).endswith('3')
+        await client.close()
+    serve(test)
+
+
+def test_session_cap():
+    async def test(connect):
+        first = await connect()
+        await first.prompt()
+        second = await connect()
+        assert 'too many sessions' in (await second.reader.read()).decode(ENCODING)
+        await first.close()
+    serve(test, max_sessions=1)
+
+
+def test_long_evaluations_do_not_block_other_sessions():
+    async def test(connect):
+        slow, fast = await connect(), await connect()
+        await slow.prompt()
+        await fast.prompt()
+        started = time.perf_counter()
+        pending = asyncio.ensure_future(slow.eval('(sleep 1)'))
+        await asyncio.sleep(0.1)
+        assert await fast.eval('(* 6 7)') == '42'
+        assert time.perf_counter() - started < 0.8
+        await pending
+        await slow.close()
+        await fast.close()
+    serve(test)
+
+
+def test_unix_socket(tmp_path):
+    async def main():
+        server = ReplServer()
+        path = str(tmp_path / 'repl.sock')
+        listener = await server.start_unix(path)
+        try:
+            async with listener:
+                client = Client(*await asyncio.open_unix_connection(path))
+                await client.prompt()
+                assert await client.eval('(list 1 2)') == '(1 2)'
+                await client.close()
+        finally:
+            server.close()
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+import gc
+import itertools
+import weakref
+from src.file import run
+from src.streams import Promise, iterator_to_stream, stream_to_list
+
+INTEGERS = '(define ints (lambda (n) (stream-cons n (ints (+ n 1)))))'
+
+
+def test_promises_run_once():
+    calls = []
+    promise = Promise(lambda: calls.append(1) or len(calls))
+    assert promise.force() == 1 and promise.force() == 1
+    assert calls == [1] and promise.thunk is None
+    assert run('(define n 0) (define p (delay (begin (set! n (+ n 1)) n))) '
+               '(force p) (force p) n') == 1
+    assert run('(force (make-promise 5))') == 5 and run('(force 5)') == 5
+
+
+def test_infinite_streams_are_lazy():
+    source = INTEGERS + '''
+    (stream->list (stream-take (stream-filter (lambda (x) (= 0 (- x (* 2 (round (/ x 2))))))
+                                              (stream-map * (ints 1) (ints 1)))
+                               3))'''
+    assert run(source) == [4, 16, 36]
+    assert run(INTEGERS + '(stream-car (stream-drop (ints 0) 1000))') == 1000
+
+
+def test_stream_predicates():
+    assert run('(stream-null? the-empty-stream)') is True
+    assert run(INTEGERS + '(list (stream? (ints 0)) (stream-pair? (ints 0)) '
+                          '(stream-pair? the-empty-stream))') == [True, True, False]
+
+
+def test_python_iterators_are_pulled_on_demand():
+    pulled = []
+    source = (pulled.append(i) or i for i in itertools.count())
+    stream = iterator_to_stream(source)
+    assert stream_to_list(stream, 3) == [0, 1, 2]
+    assert pulled == [0, 1, 2]
+    assert stream_to_list(stream, 0) == []
+    assert run('(stream-fold + 0 (iterator->stream data))', {'data': range(101)}) == 5050
+
+
+def test_stream_for_each_does_not_keep_the_head_alive():
+    class Item:
+        pass
+
+    refs = []
+
+    def items():
+        for _ in range(1000):
+            item = Item()
+            refs.append(weakref.ref(item))
+            yield item
+
+    def check(item):
+        if len(refs) % 50:
+            return
+        gc.collect()
+        check.alive = max(check.alive, sum(ref() is not None for ref in refs))
+    check.alive = 0
+
+    run('(stream-for-each check (iterator->stream data))', {'data': items(), 'check': check})
+    assert len(refs) == 1000 and check.alive < 10
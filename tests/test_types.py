@@ -0,0 +1,45 @@
+import pytest
+from src.exceptions import UnknownCharacterName
+from src.file import run
+from src.types import Char, HashTable, Symbol, hash_key
+
+
+def test_hash_keys_keep_types_apart():
+    keys = [1, True, 1.0, '1', Symbol('a'), 'a', Char('a'), [1, 2], [1.0, 2]]
+    assert len({hash_key(key) for key in keys}) == len(keys)
+    assert hash_key([1, [Symbol('x')]]) == hash_key([1, [Symbol('x')]])
+
+
+def test_hash_table_numbers_and_booleans():
+    source = '''
+    (define h (make-hash))
+    (hash-set! h 1 (quote a))
+    (hash-set! h (= 1 1) (quote b))
+    (hash-set! h 1.0 (quote c))
+    (list (hash-count h) (hash-ref h 1) (hash-ref h (= 1 1)) (hash-ref h 1.0))'''
+    assert run(source) == [3, 'a', 'b', 'c']
+
+
+def test_hash_table_list_keys_are_structural():
+    table = HashTable()
+    table.set([1, 2], 'x')
+    assert table.get([1, 2]) == 'x'
+    assert [1, 2] in table
+
+
+def test_string_and_char_literals():
+    assert run('(string-append "a\\"b" "\\n")') == 'a"b\n'
+    assert run('(list #\\( #\\space #\\a)') == [Char('('), Char(' '), Char('a')]
+    assert isinstance(run('(string->symbol "x")'), Symbol)
+
+
+def test_symbols_are_interned():
+    assert run("(eq? (quote abc) (quote abc))") is True
+    assert run('(eq? (string->symbol "abc") (quote abc))') is True
+    assert run("(eq? (quote abc) (quote abd))") is False
+
+
+def test_unknown_character_names_are_rejected():
+    with pytest.raises(UnknownCharacterName) as info:
+        run('(list #\\a #\\foo)')
+    assert str(info.value.position) == '<string>:1:11'